@@ -0,0 +1,68 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from scheduled_increasing_with_shift_scenario_simulation import NearestNodeMapper, ScheduledIncreaseWithShiftSimulation
+
+
+def parse_columns(value: str | None) -> tuple[str, str] | None:
+    # 'lat_col,lon_col' → (lat_col, lon_col)
+    if not value:
+        return None
+    parts = [p.strip() for p in value.split(',')]
+    if len(parts) != 2 or not all(parts):
+        raise argparse.ArgumentTypeError(f"'위도열,경도열' 형식이어야 함: {value}")
+    return parts[0], parts[1]
+
+
+def map_demand_file(input_csv: str,
+                    output_csv: str,
+                    network_format: str = 'pickle',
+                    origin_columns: tuple[str, str] | None = None,
+                    dest_columns: tuple[str, str] | None = None,
+                    chunk_size: int = 200000) -> int:
+    sim = ScheduledIncreaseWithShiftSimulation()
+    sim.load_network(network_format)
+    if sim.network_graph is None:
+        raise RuntimeError('네트워크를 불러오지 못함')
+
+    started = time.perf_counter()
+    mapper = NearestNodeMapper.from_graph(sim.network_graph)
+    print(f"KD-tree 구축: 노드 {len(mapper.node_ids):,}개 ({time.perf_counter() - started:.2f}s)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_csv)), exist_ok=True)
+    tmp_path = f"{output_csv}.tmp.{os.getpid()}"
+    total = 0
+    try:
+        for i, chunk in enumerate(pd.read_csv(input_csv, chunksize=chunk_size)):
+            mapped = mapper.map_dataframe(chunk, origin_columns, dest_columns)
+            mapped.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False, encoding='utf-8-sig' if i == 0 else 'utf-8')
+            total += len(mapped)
+            far = mapped[['boarding_node_distance', 'arrival_node_distance']].max(axis=1)
+            print(f"  {total:,}행 매핑 (이번 묶음 최대 스냅 거리 {far.max():.3f}km)")
+        os.replace(tmp_path, output_csv)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    print(f"완료: {total:,}행 → {output_csv} ({time.perf_counter() - started:.2f}s)")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Snap raw demand coordinates to the nearest network nodes')
+    parser.add_argument('--input', required=True, help='Raw demand CSV with origin/destination coordinates')
+    parser.add_argument('--output', default='data/demand_main_network_mapped.csv', help='Mapped demand CSV read by the simulator')
+    parser.add_argument('--network-format', choices=['pickle', 'compact'], default='pickle', help='Network file format to load')
+    parser.add_argument('--origin-columns', type=parse_columns, default=None, help="Origin 'lat,lon' columns (auto-detected when omitted)")
+    parser.add_argument('--dest-columns', type=parse_columns, default=None, help="Destination 'lat,lon' columns (auto-detected when omitted)")
+    parser.add_argument('--chunk-size', type=int, default=200000, help='Rows per mapping batch')
+    args = parser.parse_args()
+
+    map_demand_file(args.input, args.output, args.network_format, args.origin_columns, args.dest_columns, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
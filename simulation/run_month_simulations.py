@@ -1,22 +1,27 @@
 import subprocess
 import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import os
+import sys
+import time
 
 
-def run_simulation_for_date(script_name: str,
-                            date_str: str,
-                            python_executable: str,
-                            increasing: bool = False,
-                            schedule_csv: str = 'data/additional_depot_vehicles_schedule_template_v1.csv',
-                            lunch_realloc: str | None = None,
-                            lunch_duration: int = 60,
-                            force_both: bool = False,
-                            region_strict_ratio: float | None = None,
-                            adjust_schedule: bool = False,
-                            shift_rule: str | None = None,
-                            ratio: float | None = None) -> bool:
-    cmd = [python_executable, script_name, '--date', date_str]
+def build_simulation_options(script_name: str,
+                             increasing: bool = False,
+                             schedule_csv: str = 'data/additional_depot_vehicles_schedule_template_v1.csv',
+                             lunch_realloc: str | None = None,
+                             lunch_duration: int = 60,
+                             force_both: bool = False,
+                             region_strict_ratio: float | None = None,
+                             adjust_schedule: bool = False,
+                             shift_rule: str | None = None,
+                             ratio: float | None = None,
+                             engine: str = 'tick',
+                             progress_interval: int | None = None,
+                             result_cache: bool = True) -> list[str]:
+    """날짜와 무관한 시뮬레이션 옵션 목록 (--date 제외). 하위 프로세스 명령과 프로세스 내 실행이 함께 사용"""
+    cmd = []
 
     # scheduled 전용 옵션 전파
     if os.path.basename(script_name) == 'scheduled_increasing_with_shift_scenario_simulation.py':
@@ -38,16 +43,81 @@ def run_simulation_for_date(script_name: str,
             cmd.extend(['--shift-rule', shift_rule])
         if ratio is not None:
             cmd.extend(['--ratio', str(ratio)])
+        if engine and engine != 'tick':
+            cmd.extend(['--engine', engine])
+        if progress_interval:
+            cmd.extend(['--progress-interval', str(progress_interval)])
+        if not result_cache:
+            cmd.append('--no-result-cache')
+    return cmd
 
+
+def build_simulation_command(script_name: str,
+                             date_str: str,
+                             python_executable: str,
+                             increasing: bool = False,
+                             schedule_csv: str = 'data/additional_depot_vehicles_schedule_template_v1.csv',
+                             lunch_realloc: str | None = None,
+                             lunch_duration: int = 60,
+                             force_both: bool = False,
+                             region_strict_ratio: float | None = None,
+                             adjust_schedule: bool = False,
+                             shift_rule: str | None = None,
+                             ratio: float | None = None,
+                             engine: str = 'tick',
+                             progress_interval: int | None = None,
+                             result_cache: bool = True) -> list[str]:
+    options = build_simulation_options(script_name, increasing, schedule_csv, lunch_realloc, lunch_duration, force_both,
+                                       region_strict_ratio, adjust_schedule, shift_rule, ratio, engine, progress_interval,
+                                       result_cache)
+    return [python_executable, script_name, '--date', date_str] + options
+
+
+def _stderr_tail(stderr: bytes | str | None, lines: int) -> str:
+    if not stderr:
+        return ''
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode('utf-8', errors='replace')
+    return '\n'.join(stderr.rstrip().splitlines()[-lines:])
+
+
+def run_simulation_command(cmd: list[str], timeout: float | None = None, tail_lines: int = 20) -> tuple[bool, str]:
+    """하루 시뮬레이션 실행 → (성공 여부, 실패 시 stderr 마지막 tail_lines줄)"""
     try:
-        # 자식 프로세스의 상세 로그는 숨김
-        result = subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        return True
-    except subprocess.CalledProcessError as e:
-        return False
+        # 자식 프로세스의 상세 로그는 숨기고, 실패 원인 확인용 stderr만 수집
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        tail = _stderr_tail(e.stderr, tail_lines)
+        return False, f'Timed out after {timeout:g}s' + (f'\n{tail}' if tail else '')
     except FileNotFoundError:
-        print(f"Error: Python executable not found at '{python_executable}' or script '{script_name}' not found.")
-        return False
+        return False, f"Python executable not found at '{cmd[0]}' or script '{cmd[1]}' not found."
+    if result.returncode != 0:
+        return False, f'Exit code {result.returncode}\n' + _stderr_tail(result.stderr, tail_lines)
+    return True, ''
+
+
+def run_simulation_for_date(script_name: str,
+                            date_str: str,
+                            python_executable: str,
+                            increasing: bool = False,
+                            schedule_csv: str = 'data/additional_depot_vehicles_schedule_template_v1.csv',
+                            lunch_realloc: str | None = None,
+                            lunch_duration: int = 60,
+                            force_both: bool = False,
+                            region_strict_ratio: float | None = None,
+                            adjust_schedule: bool = False,
+                            shift_rule: str | None = None,
+                            ratio: float | None = None,
+                            engine: str = 'tick',
+                            progress_interval: int | None = None,
+                            timeout: float | None = None) -> bool:
+    cmd = build_simulation_command(script_name, date_str, python_executable, increasing, schedule_csv, lunch_realloc,
+                                   lunch_duration, force_both, region_strict_ratio, adjust_schedule, shift_rule, ratio,
+                                   engine, progress_interval)
+    success, message = run_simulation_command(cmd, timeout=timeout)
+    if not success and message:
+        print(message)
+    return success
 
 
 def main():
@@ -70,6 +140,20 @@ def main():
     parser.add_argument('--adjust-schedule', action='store_true', help='Enable driver shift adjustment (scheduled only)')
     parser.add_argument('--shift-rule', type=str, default=None, help="Shift rule like '6to4' (scheduled only)")
     parser.add_argument('--ratio', type=float, default=None, help='Share of drivers to adjust 0.0~1.0 (scheduled only)')
+    parser.add_argument('--engine', type=str, choices=['tick', 'event'], default='tick',
+                        help="Simulation engine: 'tick' or 'event' (scheduled only)")
+    parser.add_argument('--progress-interval', type=int, default=None,
+                        help='Progress snapshot interval in simulated seconds (scheduled only, default 300)')
+    # 병렬 실행
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Number of days to run concurrently (1 = sequential, 0 = one per CPU core)')
+    parser.add_argument('--timeout', type=float, default=None, help='Per-day timeout in seconds (default: none)')
+    parser.add_argument('--stderr-lines', type=int, default=20, help='stderr lines to show for each failed day')
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help='Re-simulate every day instead of reusing cached results for unchanged inputs (scheduled only)')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Load the network/depots/vehicles once per worker and reset per-day state instead of '
+                             'starting a new Python process for every day (scheduled only; --timeout is not enforced)')
 
     args = parser.parse_args()
 
@@ -96,36 +180,105 @@ def main():
         print(f"  lunch-realloc: {args.lunch_realloc if args.lunch_realloc else 'None'} | lunch-duration: {args.lunch_duration}m")
         print(f"  force-both: {'ON' if args.force_both else 'OFF'} | region-ratio: {args.region_strict_ratio if args.region_strict_ratio is not None else 'None'}")
         print(f"  shift: {'ON' if args.adjust_schedule else 'OFF'} | rule: {args.shift_rule if args.shift_rule else 'None'} | ratio: {args.ratio if args.ratio is not None else 'None'}")
+        print(f"  engine: {args.engine}")
 
-    ok_days: list[str] = []
-    bad_days: list[str] = []
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1:
+        print(f"  jobs: {jobs} | timeout: {f'{args.timeout:g}s' if args.timeout else 'None'}")
+    in_process = args.in_process and args.script == 'scheduled'
+    if args.in_process and not in_process:
+        print('  in-process: baseline script is not supported, running one process per day')
+    elif in_process:
+        print('  in-process: ON (world loaded once per worker)')
+        if args.timeout:
+            print('  Warning: --timeout is not enforced with --in-process')
 
+    dates = []
     cur = start_date
     while cur <= end_date:
-        date_str = cur.strftime('%Y-%m-%d')
-        print(f"\n--- {date_str} ---")
-        success = run_simulation_for_date(
-            script_name=script_file,
-            date_str=date_str,
-            python_executable=args.python,
-            increasing=args.increasing,
-            schedule_csv=args.schedule_csv,
-            lunch_realloc=args.lunch_realloc,
-            lunch_duration=args.lunch_duration,
-            force_both=args.force_both,
-            region_strict_ratio=args.region_strict_ratio,
-            adjust_schedule=args.adjust_schedule,
-            shift_rule=args.shift_rule,
-            ratio=args.ratio
-        )
-        (ok_days if success else bad_days).append(date_str)
+        dates.append(cur.strftime('%Y-%m-%d'))
         cur += timedelta(days=1)
+    sim_options = build_simulation_options(
+        script_name=script_file,
+        increasing=args.increasing,
+        schedule_csv=args.schedule_csv,
+        lunch_realloc=args.lunch_realloc,
+        lunch_duration=args.lunch_duration,
+        force_both=args.force_both,
+        region_strict_ratio=args.region_strict_ratio,
+        adjust_schedule=args.adjust_schedule,
+        shift_rule=args.shift_rule,
+        ratio=args.ratio,
+        engine=args.engine,
+        progress_interval=args.progress_interval,
+        result_cache=not args.no_result_cache
+    )
+    commands = {date_str: [args.python, script_file, '--date', date_str] + sim_options for date_str in dates}
+
+    ok_days: list[str] = []
+    bad_days: list[str] = []
+    failures: dict[str, str] = {}
+
+    if in_process:
+        script_dir = os.path.dirname(script_file)
+        if script_dir not in sys.path:
+            sys.path.insert(0, script_dir)
+        import scheduled_increasing_with_shift_scenario_simulation as sim
+
+    def in_process_result(date_str: str, output_file: str | None, error: str, elapsed: float) -> tuple[str, bool, str, float]:
+        return date_str, output_file is not None, error, elapsed
+
+    def run_day(date_str: str) -> tuple[str, bool, str, float]:
+        if in_process:
+            return in_process_result(date_str, *sim.run_worker_day(date_str, tail_lines=args.stderr_lines))
+        started = time.time()
+        success, message = run_simulation_command(commands[date_str], timeout=args.timeout, tail_lines=args.stderr_lines)
+        return date_str, success, message, time.time() - started
+
+    def record(date_str: str, success: bool, message: str, elapsed: float, header: bool):
+        status = 'OK' if success else 'FAILED'
+        print(f"\n--- {date_str} --- {status} ({elapsed:.1f}s)" if header else f"{status} ({elapsed:.1f}s)")
+        if not success:
+            failures[date_str] = message
+        (ok_days if success else bad_days).append(date_str)
+
+    if in_process:
+        started = time.time()
+        sim.init_worker(sim_options)
+        print(f"  world loaded ({time.time() - started:.1f}s)")
+
+    if jobs <= 1:
+        for date_str in dates:
+            print(f"\n--- {date_str} ---")
+            record(*run_day(date_str), header=False)
+    else:
+        # 첫 날은 단독 실행해 공유 디스크 캐시(경로 캐시, 수요 분할, 근무표 묶음 등)를 만든 뒤 나머지 날짜를 병렬 실행
+        record(*run_day(dates[0]), header=True)
+        if in_process:
+            # 작업자 프로세스마다 월드를 한 번 로드하고 날짜를 나눠 처리
+            sim.shutdown_worker()
+            pool = ProcessPoolExecutor(max_workers=jobs, initializer=sim.init_worker, initargs=(sim_options,))
+            submit = lambda date_str: pool.submit(sim.run_worker_day, date_str, (), args.stderr_lines)
+        else:
+            pool = ThreadPoolExecutor(max_workers=jobs)
+            submit = lambda date_str: pool.submit(run_day, date_str)
+        with pool:
+            futures = {submit(date_str): date_str for date_str in dates[1:]}
+            for future in as_completed(futures):
+                result = future.result()
+                record(*(in_process_result(futures[future], *result) if in_process else result), header=True)
+        ok_days.sort()
+        bad_days.sort()
 
     print('\n=== Monthly Summary ===')
     total_days = (end_date - start_date).days + 1
     print(f'Total: {total_days} days | Success: {len(ok_days)} | Failed: {len(bad_days)}')
     if bad_days:
         print('Failed dates:', ', '.join(bad_days))
+        for date_str in bad_days:
+            if failures[date_str]:
+                print(f"\n[{date_str}] stderr (last {args.stderr_lines} lines):")
+                print(failures[date_str])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,270 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from itertools import product
+
+import pandas as pd
+
+import scheduled_increasing_with_shift_scenario_simulation as sim
+
+# 작업자당 한 번 로드하는 월드(네트워크, 경로 캐시/백엔드)를 정하는 옵션: 스윕 전체에 공통이어야 함
+WORLD_OPTIONS = {'network-format', 'routing-backend', 'alt-landmarks', 'path-cache-dir', 'no-path-cache',
+                 'path-cache-size', 'no-geo-pruning'}
+# 스윕이 셀/날짜마다 직접 정하는 옵션
+RESERVED_OPTIONS = {'date', 'results-dir'}
+
+
+def option_name(key: str) -> str:
+    # '--force-both', 'force_both' → 'force-both'
+    return str(key).lstrip('-').replace('_', '-')
+
+
+def natural_key(value: str) -> list:
+    # template_v2 < template_v10
+    return [int(t) if t.isdigit() else t for t in re.split(r'(\d+)', value)]
+
+
+def expand_value(key: str, value) -> list:
+    # schedule-csv 값의 glob 패턴은 버전 순 파일 목록으로 펼침
+    if key == 'schedule-csv' and isinstance(value, str) and glob.has_magic(value):
+        matches = sorted(glob.glob(value), key=natural_key)
+        if not matches:
+            raise ValueError(f'schedule-csv 패턴에 맞는 파일 없음: {value}')
+        return matches
+    return [value]
+
+
+def expand_axis(name: str, values) -> list[dict]:
+    # 축 값 목록 → 옵션 dict 목록. 값이 dict면 여러 옵션을 한 묶음으로 취급 (예: shift-rule + ratio)
+    if not isinstance(values, list):
+        values = [values]
+    expanded = []
+    for value in values:
+        item = {option_name(k): v for k, v in value.items()} if isinstance(value, dict) else {option_name(name): value}
+        keys = list(item)
+        for combo in product(*(expand_value(k, item[k]) for k in keys)):
+            expanded.append(dict(zip(keys, combo)))
+    return expanded
+
+
+def normalize_options(options: dict) -> dict:
+    # None/False는 '옵션 없음'과 같으므로 제거 (셀 ID가 표기 방식에 따라 달라지지 않도록)
+    return {k: v for k, v in sorted(options.items()) if v is not None and v is not False}
+
+
+def options_to_argv(options: dict) -> list[str]:
+    argv = []
+    for key, value in normalize_options(options).items():
+        if value is True:
+            argv.append(f'--{key}')
+        else:
+            argv.extend([f'--{key}', str(value)])
+    return argv
+
+
+def cell_id_for(options: dict) -> str:
+    payload = json.dumps(normalize_options(options), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def expand_dates(spec) -> list[str]:
+    # 날짜 목록, {"year", "month"} 또는 {"start", "end"}
+    if isinstance(spec, list):
+        return [str(d) for d in spec]
+    if not isinstance(spec, dict):
+        raise ValueError(f'dates 형식 오류: {spec!r}')
+    if 'year' in spec and 'month' in spec:
+        start = datetime(int(spec['year']), int(spec['month']), 1)
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    else:
+        start = datetime.strptime(spec['start'], '%Y-%m-%d')
+        end = datetime.strptime(spec['end'], '%Y-%m-%d')
+    dates = []
+    cur = start
+    while cur <= end:
+        dates.append(cur.strftime('%Y-%m-%d'))
+        cur += timedelta(days=1)
+    return dates
+
+
+def load_spec(path: str) -> tuple[dict, list[tuple[str, dict]], list[str]]:
+    """그리드 명세(JSON) → (월드 옵션, [(셀 ID, 셀 옵션)], 날짜 목록)
+
+    {"dates": {"year": 2025, "month": 6},
+     "world": {"network-format": "compact"},
+     "fixed": {"engine": "event"},
+     "grid": {"fleet": [{}, {"increasing": true, "schedule-csv": "data/additional_depot_vehicles_schedule_template_v*.csv"}],
+              "shift": [{}, {"adjust-schedule": true, "shift-rule": "6to4", "ratio": 0.3}],
+              "force-both": [false, true]}}
+
+    grid의 각 축은 옵션 이름 → 값 목록 또는 옵션 묶음(dict) 목록이며, 셀은 모든 축의 곱집합이다.
+    """
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    world = {option_name(k): v for k, v in (spec.get('world') or {}).items()}
+    fixed = {option_name(k): v for k, v in (spec.get('fixed') or {}).items()}
+    axes = [expand_axis(name, values) for name, values in (spec.get('grid') or {}).items()]
+    dates = expand_dates(spec.get('dates') or [])
+    if not dates:
+        raise ValueError('dates가 비어 있음')
+
+    parser = sim.build_arg_parser()
+    for key in world:
+        if key not in WORLD_OPTIONS:
+            raise ValueError(f"world에는 {sorted(WORLD_OPTIONS)}만 지정 가능: '{key}'")
+    cells = {}
+    for combo in product(*axes):
+        options = dict(fixed)
+        for item in combo:
+            options.update(item)
+        bad = (set(options) & (WORLD_OPTIONS | RESERVED_OPTIONS))
+        if bad:
+            raise ValueError(f'셀 옵션으로 지정할 수 없음: {sorted(bad)}')
+        try:
+            parser.parse_args(options_to_argv(world) + options_to_argv(options))
+        except SystemExit:
+            raise ValueError(f'잘못된 셀 옵션: {options_to_argv(options)}') from None
+        cells.setdefault(cell_id_for(options), normalize_options(options))
+    return normalize_options(world), list(cells.items()), dates
+
+
+def read_journal(path: str) -> dict:
+    # (셀 ID, 날짜) → 마지막 기록
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # 중단 시 잘린 마지막 줄
+            records[(rec['cell'], rec['date'])] = rec
+    return records
+
+
+def write_index(out_dir: str, cells: list[tuple[str, dict]], dates: list[str], journal: dict) -> str:
+    # 셀 × 날짜 통합 색인: 상태, 결과 파일(스윕 디렉터리 기준 상대 경로), 소요초, 셀 옵션 열
+    option_keys = sorted({k for _, options in cells for k in options})
+    rows = []
+    for cell_id, options in cells:
+        for date_str in dates:
+            rec = journal.get((cell_id, date_str)) or {}
+            error_lines = (rec.get('error') or '').strip().splitlines()
+            row = {'cell_id': cell_id, 'date': date_str,
+                   'status': 'PENDING' if not rec else ('OK' if rec['ok'] else 'FAILED'),
+                   'output_file': rec.get('output_file'),
+                   'seconds': rec.get('seconds'),
+                   'error': error_lines[-1] if error_lines else None}
+            for key in option_keys:
+                row[key] = options.get(key)
+            rows.append(row)
+    path = os.path.join(out_dir, 'index.csv')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    pd.DataFrame(rows).to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, path)
+    return path
+
+
+def run_task(cell_id: str, cell_argv: list[str], date_str: str, results_dir: str,
+             tail_lines: int = 20) -> tuple[str, str, str | None, str, float]:
+    """작업자의 준비된 월드(sim.init_worker)에서 셀 하루 실행 → (셀 ID, 날짜, 결과 파일 또는 None, 오류, 소요초)"""
+    output_file, error, elapsed = sim.run_worker_day(date_str, cell_argv + ['--results-dir', results_dir], tail_lines)
+    return cell_id, date_str, output_file, error, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a grid of scenario cells over a date range, sharing the loaded world per worker.')
+    parser.add_argument('--spec', type=str, required=True, help='Grid spec JSON (dates, world, fixed, grid)')
+    parser.add_argument('--out', type=str, default=None, help='Sweep output directory (default: results/sweeps/<spec name>)')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes (1 = sequential, 0 = one per CPU core)')
+    parser.add_argument('--stderr-lines', type=int, default=20, help='Traceback lines to keep for each failed cell-day')
+    parser.add_argument('--dry-run', action='store_true', help='List cells and pending cell-days without running')
+    args = parser.parse_args()
+
+    world, cells, dates = load_spec(args.spec)
+    out_dir = args.out or os.path.join('results', 'sweeps', os.path.splitext(os.path.basename(args.spec))[0])
+    os.makedirs(out_dir, exist_ok=True)
+    journal_path = os.path.join(out_dir, 'journal.jsonl')
+    journal = read_journal(journal_path)
+
+    cell_argv = {cell_id: options_to_argv(options) for cell_id, options in cells}
+    with open(os.path.join(out_dir, 'cells.json'), 'w', encoding='utf-8') as f:
+        json.dump({'world': world, 'dates': dates,
+                   'cells': {cell_id: {'options': options, 'argv': cell_argv[cell_id]} for cell_id, options in cells}},
+                  f, ensure_ascii=False, indent=2)
+
+    # 재개: 성공 기록이 있고 결과 파일이 남아 있는 셀-날짜는 건너뜀. 날짜 우선 순서로 배치해 작업자 경로 캐시 재사용
+    def done(cell_id, date_str):
+        rec = journal.get((cell_id, date_str))
+        return bool(rec and rec['ok'] and rec.get('output_file') and os.path.exists(os.path.join(out_dir, rec['output_file'])))
+
+    tasks = [(cell_id, date_str) for date_str in dates for cell_id, _ in cells if not done(cell_id, date_str)]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    print(f'=== Scenario sweep: {len(cells)} cells x {len(dates)} days = {len(cells) * len(dates)} cell-days ===')
+    print(f'  out: {out_dir} | pending: {len(tasks)} | jobs: {jobs}')
+    if world:
+        print(f"  world: {' '.join(options_to_argv(world))}")
+    if args.dry_run:
+        for cell_id, _ in cells:
+            print(f"  {cell_id}: {' '.join(cell_argv[cell_id]) or '(defaults)'}")
+        return
+
+    world_argv = options_to_argv(world)
+    counts = {'OK': 0, 'FAILED': 0}
+
+    def submit_args(task):
+        cell_id, date_str = task
+        return cell_id, cell_argv[cell_id], date_str, os.path.join(out_dir, 'cells', cell_id), args.stderr_lines
+
+    def record(log, cell_id, date_str, output_file, error, elapsed):
+        ok = output_file is not None
+        rec = {'cell': cell_id, 'date': date_str, 'ok': ok, 'seconds': round(elapsed, 1),
+               'output_file': os.path.relpath(output_file, out_dir) if ok else None, 'error': error}
+        journal[(cell_id, date_str)] = rec
+        log.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        log.flush()
+        counts['OK' if ok else 'FAILED'] += 1
+        print(f"[{sum(counts.values())}/{len(tasks)}] {date_str} {cell_id} {'OK' if ok else 'FAILED'} ({elapsed:.1f}s)")
+        if not ok and error:
+            print(error)
+
+    started = time.time()
+    try:
+        with open(journal_path, 'a', encoding='utf-8') as log:
+            if tasks:
+                sim.init_worker(world_argv)
+            if jobs <= 1:
+                for task in tasks:
+                    record(log, *run_task(*submit_args(task)))
+            elif tasks:
+                # 첫 작업은 단독 실행해 공유 디스크 캐시(경로 캐시, 수요 분할, 근무표 묶음)를 만든 뒤 나머지를 병렬 실행
+                record(log, *run_task(*submit_args(tasks[0])))
+                sim.shutdown_worker()
+                pool = ProcessPoolExecutor(max_workers=jobs, initializer=sim.init_worker, initargs=(world_argv,))
+                try:
+                    futures = [pool.submit(run_task, *submit_args(task)) for task in tasks[1:]]
+                    for future in as_completed(futures):
+                        record(log, *future.result())
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                pool.shutdown()
+    except KeyboardInterrupt:
+        print('\n중단됨: 같은 명령으로 다시 실행하면 남은 셀-날짜부터 이어서 실행')
+    finally:
+        index_path = write_index(out_dir, cells, dates, journal)
+
+    print('\n=== Sweep Summary ===')
+    print(f"Ran: {sum(counts.values())} | Success: {counts['OK']} | Failed: {counts['FAILED']} | {time.time() - started:.1f}s")
+    print(f'Index: {index_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,22 @@
 # -*- coding: utf-8 -*-
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import networkx as nx
 import pickle
 from enum import Enum
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict
+from itertools import count, islice
+import copy
+import hashlib
+import heapq
+import json
+import math
 import time
 import os
 import re
+import shutil
 
 
 class VehicleStatus(Enum):
@@ -31,6 +39,26 @@ class PassengerStatus(Enum):
     CANCELLED = "CANCELLED"
 
 
+# 시뮬레이션 내부 시계: 당일 자정 기준 경과 초(int). datetime은 로드/결과 저장/진행 로그에서만 사용
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def format_clock(seconds):
+    # 자정 기준 초 → 'HH:MM:SS' (전날/익일 값은 24시간으로 순환)
+    seconds = int(seconds) % SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def advance_clock(seconds, delta_seconds):
+    # 시계 + 소요초. timedelta와 동일하게 마이크로초 단위로 반올림
+    return seconds + round(delta_seconds, 6)
+
+
+# 진행 스냅샷 차량 카운터 (차량별 플래그 튜플과 같은 순서)
+PROGRESS_COUNTER_KEYS = ('active', 'available', 'busy', 'lunch_total', 'lunch_blocked_idle', 'lunch_in_service', 'added_active')
+
+
 class Location:
     def __init__(self, node_id):
         self.node_id = node_id
@@ -46,8 +74,8 @@ class Vehicle:
         self.depot_name = depot_name
         self.service_area = service_area  # "INSIDE_ONLY" 또는 "BOTH"
         self.assigned_passenger = None
-        self.service_start_time = None
-        self.service_end_time = None
+        self.service_start_time = None  # 자정 기준 초
+        self.service_end_time = None  # 자정 기준 초(소수 가능)
         self.daily_services = 0
         self.accurate_schedule = {}
         self.work_start = None
@@ -57,6 +85,8 @@ class Vehicle:
         self.total_service_time = 0.0
         # 점심시간 조정 창 목록 [(start_dt, end_dt), ...]
         self.lunch_windows = []
+        # 점심 창의 자정 기준 초 표현 [(start_s, end_s), ...] (run_simulation 시작 시 구성)
+        self.lunch_seconds = []
 
 
 class Passenger:
@@ -69,6 +99,8 @@ class Passenger:
         self.mode = mode
         self.is_outside_area = is_outside_area
         self.status = PassengerStatus.REQUESTED
+        # request_time은 로드된 datetime, request_second 및 이하 시각은 자정 기준 초
+        self.request_second = None
         self.assigned_vehicle = None
         self.assigned_time = None
         self.pickup_time = None
@@ -81,17 +113,1460 @@ class Passenger:
         self.dropoff_depot_name = dropoff_depot_name
 
 
+class PendingPassengerQueue:
+    """대기(WAITING) 승객 큐: 요청 순 FIFO, O(1) 포함 여부/제거, 관외·관내 하위 큐 유지
+
+    len()과 포함 여부는 대기열에 들어온 뒤 재시도에서 바로 배정된 승객(retire)까지 포함한다.
+    (진행 스냅샷의 '미배정 대기' 집계 기준 유지) 배정 대상 순회는 아직 대기 중인 승객만 본다.
+    """
+
+    def __init__(self):
+        self._members = {}  # 대기열에 들어온 승객 전체 (삽입 순서)
+        self._waiting = {}  # 아직 배정되지 않은 승객 (삽입 순서)
+        self._outside = {}  # 대기 중 관외 승객
+        self._inside = {}  # 대기 중 관내 승객
+
+    def __len__(self):
+        return len(self._members)
+
+    def __bool__(self):
+        return bool(self._members)
+
+    def __contains__(self, passenger):
+        return passenger in self._members
+
+    def __iter__(self):
+        return iter(list(self._members))
+
+    def append(self, passenger):
+        if passenger in self._members:
+            return
+        self._members[passenger] = None
+        self._waiting[passenger] = None
+        (self._outside if passenger.is_outside_area else self._inside)[passenger] = None
+
+    def _drop_waiting(self, passenger):
+        self._waiting.pop(passenger, None)
+        (self._outside if passenger.is_outside_area else self._inside).pop(passenger, None)
+
+    def remove(self, passenger):
+        del self._members[passenger]
+        self._drop_waiting(passenger)
+
+    def retire(self, passenger):
+        # 대기열 밖에서 배정된 승객: 대기 순회에서만 제외 (len에는 남김)
+        if passenger in self._members:
+            self._drop_waiting(passenger)
+
+    def clear(self):
+        self._members.clear()
+        self._waiting.clear()
+        self._outside.clear()
+        self._inside.clear()
+
+    def waiting(self):
+        return list(self._waiting)
+
+    def has_waiting(self):
+        return bool(self._waiting)
+
+    def waiting_counts(self):
+        return len(self._outside), len(self._inside)
+
+    def head(self, outside, n):
+        # 하위 큐 앞쪽 n명 (FIFO)
+        return list(islice(self._outside if outside else self._inside, n))
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_directory_atomic(directory, meta, write_files):
+    # write_files(tmp_dir)로 채운 임시 디렉터리에 meta.json을 더해 directory와 교체. 실패해도 임시/이전 디렉터리를 남기지 않음
+    tmp_dir = f'{directory}.{os.getpid()}.tmp'
+    old_dir = f'{directory}.{os.getpid()}.old'
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        write_files(tmp_dir)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # 동시에 같은 입력으로 만든 다른 실행이 먼저 자리를 잡음: 그 결과 사용
+            if not os.path.isdir(directory):
+                raise
+    finally:
+        for leftover in (tmp_dir, old_dir):
+            if os.path.exists(leftover):
+                shutil.rmtree(leftover, ignore_errors=True)
+    return meta
+
+
+def save_npy_arrays(directory, arrays):
+    for name, arr in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), arr)
+
+
+# 파일 SHA-256 (경로, 크기, 수정시각) → 해시. 같은 프로세스에서 같은 입력을 다시 해시하지 않도록
+_DIGEST_CACHE = {}
+
+
+def file_digest_cached(path):
+    # 바뀌지 않은 파일은 이전 해시 재사용, 없는 파일은 None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _DIGEST_CACHE.get(key)
+    if digest is None:
+        digest = _DIGEST_CACHE[key] = file_sha256(path)
+    return digest
+
+
+# 입력 CSV 파싱 결과 (경로, 크기, 수정시각) → DataFrame. 같은 프로세스의 반복 로드(일자별 실행 등)에서 재사용
+_CSV_CACHE = OrderedDict()
+CSV_CACHE_SIZE = 16
+
+
+def read_csv_cached(path, **kwargs):
+    # 파일이 바뀌지 않았으면 이전 파싱 결과의 사본 반환 (없는 파일은 FileNotFoundError)
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, tuple(sorted(kwargs.items())))
+    df = _CSV_CACHE.get(key)
+    if df is None:
+        df = pd.read_csv(path, **kwargs)
+        _CSV_CACHE[key] = df
+        while len(_CSV_CACHE) > CSV_CACHE_SIZE:
+            _CSV_CACHE.popitem(last=False)
+    else:
+        _CSV_CACHE.move_to_end(key)
+    return df.copy()
+
+
+def column_list(df, name, default=None):
+    # 열 → 파이썬 값 목록 (iterrows 행 값과 같은 타입), 열이 없으면 default 반복
+    if name is None or name not in df.columns:
+        return [default] * len(df)
+    return df[name].tolist()
+
+
+def parse_bool_column(values):
+    # 문자열은 'true'(대소문자 무시)만 참, 그 외 값은 bool() 변환
+    if values.dtype == bool:
+        return values.tolist()
+    return [v.lower() == 'true' if isinstance(v, str) else bool(v) for v in values.tolist()]
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # 대권거리(km), 배열 입력 가능
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp = p2 - p1
+    dl = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    h = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def reverse_dijkstra_lengths(graph, target, sources, weight='weight'):
+    """target으로 들어오는 역방향 Dijkstra 한 번으로 여러 출발 노드 → target 최단거리를 구함
+
+    모든 출발 노드가 확정되면 탐색을 멈춘다. 거리는 확정된 경로를 출발 노드부터 순서대로 더해
+    nx.shortest_path_length(graph, source, target)과 같은 값이 되도록 한다. 도달 불가/그래프에 없는 노드는 제외.
+    """
+    if target not in graph:
+        return {}
+    remaining = {s for s in sources if s in graph}
+    if not remaining:
+        return {}
+    pred = graph._pred if graph.is_directed() else graph._adj
+    multigraph = graph.is_multigraph()
+
+    def edge_weight(data):
+        if multigraph:
+            return min(attr.get(weight, 1) for attr in data.values())
+        return data.get(weight, 1)
+
+    settled = set()
+    seen = {target: 0}
+    next_hop = {}
+    c = count()
+    heap = [(0, next(c), target)]
+    while heap and remaining:
+        dist, _, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        settled.add(u)
+        remaining.discard(u)
+        for v, data in pred[u].items():
+            if v in settled:
+                continue
+            w = edge_weight(data)
+            vu_dist = dist + w
+            if v not in seen or vu_dist < seen[v]:
+                seen[v] = vu_dist
+                next_hop[v] = (u, w)
+                heapq.heappush(heap, (vu_dist, next(c), v))
+    lengths = {}
+    for source in sources:
+        if source in settled and source not in lengths:
+            total = 0
+            node = source
+            while node != target:
+                node, w = next_hop[node]
+                total = total + w
+            lengths[source] = total
+    return lengths
+
+
+class ALTIndex:
+    """ALT(랜드마크 A*) 전처리: 랜드마크 기준 최단거리로 A* 하한을 구성해 점대점 질의를 줄임
+
+    d(v,t) >= max(d(L,t) - d(L,v), d(v,L) - d(t,L)) 를 휴리스틱으로 쓰며, 부동소수 오차를 흡수하도록
+    (1 - HEURISTIC_MARGIN)배 축소해 항상 일관(consistent)하게 유지한다. 결과는 Dijkstra와 같은 최단거리(분).
+    """
+    HEURISTIC_MARGIN = 1e-9
+
+    def __init__(self, nodes, landmarks, dist_from, dist_to):
+        self.nodes = list(nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.landmarks = list(landmarks)
+        self.dist_from = np.asarray(dist_from, dtype=float)  # [k, v] = d(L_k, v)
+        self.dist_to = np.asarray(dist_to, dtype=float)  # [k, v] = d(v, L_k)
+        self._from_lists = self.dist_from.tolist()
+        self._to_lists = self.dist_to.tolist()
+
+    @classmethod
+    def build(cls, graph, landmark_count=8, weight='weight'):
+        # 최원점 선택: 첫 노드에서 시작해 기존 랜드마크와의 최소 거리가 가장 먼 노드를 차례로 추가
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        reverse_graph = graph.reverse(copy=False) if graph.is_directed() else graph
+
+        def lengths(g, source):
+            row = np.full(len(nodes), np.inf)
+            for node, d in nx.single_source_dijkstra_path_length(g, source, weight=weight).items():
+                row[index[node]] = d
+            return row
+
+        landmarks, dist_from, dist_to = [], [], []
+        nearest = np.full(len(nodes), np.inf)
+        candidate = nodes[0] if nodes else None
+        while candidate is not None and len(landmarks) < landmark_count:
+            landmarks.append(candidate)
+            dist_from.append(lengths(graph, candidate))
+            dist_to.append(lengths(reverse_graph, candidate))
+            nearest = np.minimum(nearest, np.where(np.isfinite(dist_from[-1]), dist_from[-1], np.inf))
+            score = np.where(np.isfinite(nearest), nearest, -1.0)
+            score[[index[l] for l in landmarks]] = -1.0
+            best = int(np.argmax(score)) if len(score) else 0
+            candidate = nodes[best] if len(score) and score[best] > 0 else None
+        return cls(nodes, landmarks, np.array(dist_from).reshape(len(landmarks), len(nodes)), np.array(dist_to).reshape(len(landmarks), len(nodes)))
+
+    @classmethod
+    def load(cls, path, graph):
+        with np.load(path, allow_pickle=True) as data:
+            nodes = data['nodes'].tolist()
+            if len(nodes) != graph.number_of_nodes() or any(node not in graph for node in nodes):
+                raise ValueError('그래프와 노드 구성이 다름')
+            return cls(nodes, data['landmarks'].tolist(), data['dist_from'], data['dist_to'])
+
+    def save(self, path):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, nodes=np.array(self.nodes, dtype=object), landmarks=np.array(self.landmarks, dtype=object),
+                         dist_from=self.dist_from, dist_to=self.dist_to)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def path_length(self, graph, source, target, weight='weight'):
+        # 랜드마크 하한 A*. 경로 없음/노드 없음은 None
+        if source not in graph or target not in graph:
+            return None
+        ti = self.index[target]
+        inf = float('inf')
+        # 목표 노드 기준 유효 항만 미리 골라 둠: (d(L,·) 행, d(L,t)) / (d(·,L) 행, d(t,L))
+        from_terms = [(row, row[ti]) for row in self._from_lists if row[ti] != inf]
+        to_terms = [(row, row[ti]) for row in self._to_lists if row[ti] != inf]
+        scale = 1.0 - self.HEURISTIC_MARGIN
+        index = self.index
+
+        def heuristic(node):
+            vi = index[node]
+            best = 0.0
+            for row, d_lt in from_terms:
+                d_lv = row[vi]
+                if d_lv != inf and d_lt - d_lv > best:
+                    best = d_lt - d_lv
+            for row, d_tl in to_terms:
+                d_vl = row[vi]
+                if d_vl != inf and d_vl - d_tl > best:
+                    best = d_vl - d_tl
+            return best * scale
+
+        succ = graph._succ if graph.is_directed() else graph._adj
+        multigraph = graph.is_multigraph()
+        c = count()
+        g_score = {source: 0}
+        closed = set()
+        heap = [(heuristic(source), next(c), source, 0)]
+        while heap:
+            _, _, u, g_u = heapq.heappop(heap)
+            if u == target:
+                return g_u
+            if u in closed:
+                continue
+            closed.add(u)
+            for v, data in succ[u].items():
+                if v in closed:
+                    continue
+                w = min(attr.get(weight, 1) for attr in data.values()) if multigraph else data.get(weight, 1)
+                g_v = g_u + w
+                if g_v < g_score.get(v, inf):
+                    g_score[v] = g_v
+                    heapq.heappush(heap, (g_v + heuristic(v), next(c), v, g_v))
+        return None
+
+
+def graph_to_csr_arrays(graph, weight='weight'):
+    """networkx 그래프 → (노드 목록, indptr, indices, weights) 정방향 CSR 배열 (행 내 열 정렬)
+
+    가중치는 networkx Dijkstra와 같게 해석한다(속성 없으면 1, 다중 간선은 최소값). 무방향 그래프는 양방향 간선.
+    """
+    nodes = list(graph.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    multigraph = graph.is_multigraph()
+    rows, cols, data = [], [], []
+    for u, nbrs in graph.adjacency():
+        ui = index[u]
+        for v, attr in nbrs.items():
+            rows.append(ui)
+            cols.append(index[v])
+            data.append(min(a.get(weight, 1) for a in attr.values()) if multigraph else attr.get(weight, 1))
+    n = len(nodes)
+    index_dtype = np.int32 if max(n, len(rows)) < np.iinfo(np.int32).max else np.int64
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(n + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return nodes, indptr, cols[order].astype(index_dtype), np.asarray(data, dtype=float)[order]
+
+
+def reverse_csr_arrays(indptr, indices, weights):
+    # 정방향 CSR → 역방향(전치) CSR. 행 안 열 인덱스 오름차순 (csr_matrix.T.tocsr() + sort_indices()와 같은 배열)
+    indptr = np.asarray(indptr)
+    indices = np.asarray(indices)
+    n = len(indptr) - 1
+    rows = np.repeat(np.arange(n, dtype=indices.dtype), np.diff(indptr))
+    order = np.lexsort((rows, indices))
+    reverse_indptr = np.zeros(n + 1, dtype=indptr.dtype)
+    np.cumsum(np.bincount(indices, minlength=n), out=reverse_indptr[1:])
+    return reverse_indptr, rows[order], np.asarray(weights, dtype=float)[order]
+
+
+class SortedNodeIndex:
+    """정수 노드 ID → CSR 위치 조회 (정렬된 노드 배열 + np.searchsorted)
+
+    노드 수만큼의 파이썬 dict를 만들지 않으므로 메모리맵 배열을 그대로 쓸 수 있다. dict처럼
+    get/[]/in/len/반복(원래 노드 순서)을 지원하며, 정수로 볼 수 없는 키는 없는 노드로 취급한다.
+    """
+
+    def __init__(self, nodes, sorted_nodes=None, positions=None):
+        self.nodes = nodes
+        if sorted_nodes is None or positions is None:
+            positions = np.argsort(np.asarray(nodes, dtype=np.int64), kind='stable')
+            sorted_nodes = np.asarray(nodes, dtype=np.int64)[positions]
+        self.sorted_nodes = sorted_nodes
+        self.positions = positions
+
+    @staticmethod
+    def _key(node):
+        # dict 조회와 같은 규칙: 값이 같은 정수(12.0, numpy 정수 포함)만 인정
+        try:
+            key = int(node)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        return key if key == node and -(1 << 63) <= key < (1 << 63) else None
+
+    def get(self, node, default=None):
+        key = self._key(node)
+        if key is None:
+            return default
+        k = int(np.searchsorted(self.sorted_nodes, key))
+        if k < len(self.sorted_nodes) and self.sorted_nodes[k] == key:
+            return int(self.positions[k])
+        return default
+
+    def get_many(self, nodes):
+        # 노드 목록 → 위치 배열 (없는 노드는 -1)
+        keys = [self._key(n) for n in nodes]
+        result = np.full(len(keys), -1, dtype=np.int64)
+        valid = np.array([key is not None for key in keys], dtype=bool)
+        if len(self.sorted_nodes) and valid.any():
+            values = np.array([key for key in keys if key is not None], dtype=np.int64)
+            k = np.minimum(np.searchsorted(self.sorted_nodes, values), len(self.sorted_nodes) - 1)
+            found = self.sorted_nodes[k] == values
+            result[np.flatnonzero(valid)[found]] = self.positions[k[found]]
+        return result
+
+    def __getitem__(self, node):
+        position = self.get(node)
+        if position is None:
+            raise KeyError(node)
+        return position
+
+    def __contains__(self, node):
+        return self.get(node) is not None
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        return iter(self.nodes.tolist())
+
+
+class CompactNetwork:
+    """main_network_graph.pkl의 읽기 전용 압축 표현: 디렉터리 안 NumPy .npy 배열 + meta.json
+
+    nodes(정수 노드 ID), latitude/longitude, indptr/indices/weights(정방향 CSR)에 더해 변환 시 미리 만든
+    reverse_*(역방향 CSR)와 sorted_nodes/sorted_positions(노드 조회용 정렬 배열)를 메모리맵으로 읽는다.
+    프로세스마다 노드 dict나 전치 행렬을 만들지 않으므로 배열은 여러 프로세스가 페이지 캐시로 공유하고,
+    프로세스별 준비는 배열을 감싸는 객체 생성뿐이다. 경로 계산은 CSRRouter로 하며, 시뮬레이터가
+    그래프에 요구하는 기능(포함 여부, nodes[노드]의 좌표, 노드/링크 수)만 제공한다.
+    """
+    FORMAT = 2
+    ARRAYS = ('nodes', 'latitude', 'longitude', 'indptr', 'indices', 'weights',
+              'reverse_indptr', 'reverse_indices', 'reverse_weights', 'sorted_nodes', 'sorted_positions')
+
+    def __init__(self, directory, meta, arrays):
+        self.directory = directory
+        self.meta = meta
+        if 'reverse_indptr' not in arrays:
+            # 이전 형식(역방향/정렬 배열 없음): 이 프로세스에서만 계산
+            arrays = dict(arrays)
+            arrays['reverse_indptr'], arrays['reverse_indices'], arrays['reverse_weights'] = reverse_csr_arrays(
+                arrays['indptr'], arrays['indices'], arrays['weights'])
+        for name in self.ARRAYS:
+            setattr(self, name + '_array', arrays.get(name))
+        self.index = SortedNodeIndex(arrays['nodes'], arrays.get('sorted_nodes'), arrays.get('sorted_positions'))
+        self.nodes = _CompactNodeView(self)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def number_of_nodes(self):
+        return len(self.index)
+
+    def number_of_edges(self):
+        return int(self.meta.get('edges', len(self.weights_array)))
+
+    @classmethod
+    def convert(cls, graph, directory, source_path=None, weight='weight'):
+        # 한 번만 수행하는 변환: 임시 디렉터리에 기록 후 교체
+        nodes, indptr, indices, weights = graph_to_csr_arrays(graph, weight)
+        if not all(isinstance(n, (int, np.integer)) and not isinstance(n, bool) for n in nodes):
+            raise ValueError('정수 노드 ID 그래프만 압축 형식으로 변환 가능')
+        node_array = np.asarray(nodes, dtype=np.int64)
+        reverse_indptr, reverse_indices, reverse_weights = reverse_csr_arrays(indptr, indices, weights)
+        sorted_positions = np.argsort(node_array, kind='stable')
+        arrays = {
+            'nodes': node_array,
+            'latitude': np.array([graph.nodes[n].get('latitude', np.nan) for n in nodes], dtype=float),
+            'longitude': np.array([graph.nodes[n].get('longitude', np.nan) for n in nodes], dtype=float),
+            'indptr': indptr,
+            'indices': indices,
+            'weights': weights,
+            'reverse_indptr': reverse_indptr,
+            'reverse_indices': reverse_indices,
+            'reverse_weights': reverse_weights,
+            'sorted_nodes': node_array[sorted_positions],
+            'sorted_positions': sorted_positions,
+        }
+        meta = {
+            'format': cls.FORMAT,
+            'nodes': len(nodes),
+            'edges': graph.number_of_edges(),
+            'directed': graph.is_directed(),
+            'weight': weight,
+        }
+        if source_path is not None:
+            stat = os.stat(source_path)
+            meta.update({'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns, 'graph_sha256': file_sha256(source_path)})
+        return write_directory_atomic(directory, meta, lambda tmp_dir: save_npy_arrays(tmp_dir, arrays))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in cls.ARRAYS
+                  if os.path.exists(os.path.join(directory, f'{name}.npy'))}
+        return cls(directory, meta, arrays)
+
+    @staticmethod
+    def is_current(directory, source_path, format_version=None):
+        # 원본 pkl이 있으면 크기/수정시각(과 지정 시 형식 버전)이 변환 당시와 같은지 확인 (원본이 없으면 압축본 그대로 사용)
+        try:
+            with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            return False
+        if not os.path.exists(source_path):
+            return True
+        if format_version is not None and meta.get('format') != format_version:
+            return False
+        stat = os.stat(source_path)
+        return meta.get('source_size') == stat.st_size and meta.get('source_mtime_ns') == stat.st_mtime_ns
+
+
+class _CompactNodeView:
+    # CompactNetwork.nodes: `node in view`, `view[node].get('latitude')` 형태만 지원
+    def __init__(self, network):
+        self._network = network
+
+    def __contains__(self, node):
+        return node in self._network.index
+
+    def __len__(self):
+        return len(self._network.index)
+
+    def __iter__(self):
+        return iter(self._network.index)
+
+    def __getitem__(self, node):
+        i = self._network.index[node]
+        return {'latitude': float(self._network.latitude_array[i]), 'longitude': float(self._network.longitude_array[i])}
+
+
+class NearestNodeMapper:
+    """그래프 노드 위경도(latitude/longitude)에 대한 최근접 노드 일괄 매핑
+
+    지역 평면(등장방형) 좌표로 KD-tree(scipy.spatial.cKDTree)를 만들고, scipy가 없으면 NumPy 묶음 계산으로 대신한다.
+    거리는 선택된 노드까지의 하버사인 거리(km).
+    """
+    ORIGIN_COLUMNS = (('origin_lat', 'origin_lon'), ('origin_latitude', 'origin_longitude'), ('origin_y', 'origin_x'),
+                      ('boarding_lat', 'boarding_lon'), ('pickup_lat', 'pickup_lon'), ('pickup_y', 'pickup_x'))
+    DEST_COLUMNS = (('destination_lat', 'destination_lon'), ('destination_latitude', 'destination_longitude'), ('destination_y', 'destination_x'),
+                    ('dest_lat', 'dest_lon'), ('arrival_lat', 'arrival_lon'), ('dropoff_lat', 'dropoff_lon'), ('dropoff_y', 'dropoff_x'))
+    BRUTE_FORCE_CHUNK = 2048
+
+    def __init__(self, node_ids, latitudes, longitudes):
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        if not valid.any():
+            raise ValueError('위경도 속성이 있는 노드가 없음')
+        self.node_ids = np.asarray(node_ids)[valid]
+        self.latitudes = lat[valid]
+        self.longitudes = lon[valid]
+        self._cos_lat0 = math.cos(math.radians(float(np.mean(self.latitudes))))
+        self._points = self._project(self.latitudes, self.longitudes)
+        try:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(self._points)
+        except Exception:
+            self._tree = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        if isinstance(graph, CompactNetwork):
+            return cls(graph.nodes_array, graph.latitude_array, graph.longitude_array)
+        node_ids = list(graph.nodes)
+        lat = [graph.nodes[n].get('latitude', np.nan) for n in node_ids]
+        lon = [graph.nodes[n].get('longitude', np.nan) for n in node_ids]
+        integer_ids = all(isinstance(n, (int, np.integer)) for n in node_ids)
+        return cls(np.array(node_ids, dtype=np.int64 if integer_ids else object), lat, lon)
+
+    def _project(self, lat, lon):
+        return np.column_stack((np.asarray(lon, dtype=float) * self._cos_lat0, np.asarray(lat, dtype=float)))
+
+    def query(self, latitudes, longitudes):
+        # 좌표 배열 → (노드 위치 인덱스, 하버사인 거리 km). 좌표 결측은 인덱스 -1, 거리 NaN
+        lat = np.asarray(latitudes, dtype=float)
+        lon = np.asarray(longitudes, dtype=float)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        positions = np.full(len(lat), -1, dtype=np.int64)
+        distances = np.full(len(lat), np.nan)
+        if not valid.any():
+            return positions, distances
+        points = self._project(lat[valid], lon[valid])
+        if self._tree is not None:
+            _, nearest = self._tree.query(points, k=1)
+        else:
+            nearest = np.empty(len(points), dtype=np.int64)
+            for start in range(0, len(points), self.BRUTE_FORCE_CHUNK):
+                block = points[start:start + self.BRUTE_FORCE_CHUNK]
+                d2 = ((block[:, None, :] - self._points[None, :, :]) ** 2).sum(axis=2)
+                nearest[start:start + len(block)] = d2.argmin(axis=1)
+        positions[valid] = nearest
+        distances[valid] = haversine_km(lat[valid], lon[valid], self.latitudes[nearest], self.longitudes[nearest])
+        return positions, distances
+
+    def map_dataframe(self, df, origin_columns=None, dest_columns=None):
+        # 출발/도착 좌표 열을 찾아 nearest_boarding_node/nearest_arrival_node 와 거리(km) 열을 채운 사본 반환
+        origin_columns = origin_columns or self.find_columns(df, self.ORIGIN_COLUMNS)
+        dest_columns = dest_columns or self.find_columns(df, self.DEST_COLUMNS)
+        if origin_columns is None or dest_columns is None:
+            raise ValueError('출발/도착 위경도 열을 찾을 수 없음')
+        mapped = df.copy()
+        for (lat_col, lon_col), node_col, dist_col in ((origin_columns, 'nearest_boarding_node', 'boarding_node_distance'),
+                                                       (dest_columns, 'nearest_arrival_node', 'arrival_node_distance')):
+            positions, distances = self.query(pd.to_numeric(mapped[lat_col], errors='coerce'), pd.to_numeric(mapped[lon_col], errors='coerce'))
+            nodes = pd.Series(self.node_ids[np.maximum(positions, 0)], index=mapped.index)
+            if self.node_ids.dtype.kind in 'iu':
+                nodes = nodes.astype('Int64')
+            mapped[node_col] = nodes.where(positions >= 0)
+            mapped[dist_col] = distances
+        return mapped
+
+    @staticmethod
+    def find_columns(df, candidates):
+        for lat_col, lon_col in candidates:
+            if lat_col in df.columns and lon_col in df.columns:
+                return lat_col, lon_col
+        return None
+
+
+class DemandPartitionStore:
+    """demand_main_network_mapped.csv의 날짜별 분할 저장소: 디렉터리 안 <YYYY-MM-DD>.pkl + meta.json
+
+    특별교통수단 행만 접수일별로 나눠 pandas pickle로 저장한다. receipt_time은 파싱된 datetime이고
+    관외 여부(is_outside_area)를 미리 계산해 두며, 각 날짜 안의 행 순서는 원본 파일 순서를 유지한다.
+    """
+    MODE = '특별교통수단'
+    HOME_AREA = '경기도 화성시'
+
+    @classmethod
+    def outside_area_flags(cls, df):
+        # origin1/destination1 중 하나라도 화성시가 아니면 관외 (열 없음/결측도 관외)
+        origin = df['origin1'].astype(str) if 'origin1' in df.columns else pd.Series('', index=df.index)
+        destination = df['destination1'].astype(str) if 'destination1' in df.columns else pd.Series('', index=df.index)
+        return (origin != cls.HOME_AREA) | (destination != cls.HOME_AREA)
+
+    @classmethod
+    def build(cls, source_path, directory, graph=None, graph_hash=None):
+        # 원본 CSV를 한 번 읽어 날짜별로 기록: 임시 디렉터리에 쓴 뒤 교체
+        stat = os.stat(source_path)
+        demand_df = pd.read_csv(source_path)
+        demand_df['receipt_time'] = pd.to_datetime(demand_df['receipt_time'])
+        special = demand_df[demand_df['mode'] == cls.MODE].copy()
+        mapped = graph is not None and ('nearest_boarding_node' not in special.columns or 'nearest_arrival_node' not in special.columns)
+        if mapped:
+            special = NearestNodeMapper.from_graph(graph).map_dataframe(special)
+        special['is_outside_area'] = cls.outside_area_flags(special)
+        days = {}
+
+        def write_days(tmp_dir):
+            for day, part in special.groupby(special['receipt_time'].dt.date, sort=True):
+                key = day.isoformat()
+                part.to_pickle(os.path.join(tmp_dir, f'{key}.pkl'))
+                days[key] = len(part)
+
+        meta = {
+            'format': 1,
+            'mode': cls.MODE,
+            'columns': list(special.columns),
+            'rows': len(special),
+            'days': days,
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+        }
+        if mapped:
+            # 노드를 직접 매핑했으면 결과가 그래프에 따라 달라지므로 그래프 해시를 함께 기록
+            meta['graph_sha256'] = graph_hash
+        return write_directory_atomic(directory, meta, write_days)
+
+    @staticmethod
+    def load_day(directory, date_str):
+        # 해당 날짜 분할만 읽음 (수요 없는 날은 같은 열의 빈 표)
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        key = pd.to_datetime(date_str).date().isoformat()
+        if key not in meta.get('days', {}):
+            return pd.DataFrame(columns=meta.get('columns', []))
+        return pd.read_pickle(os.path.join(directory, f'{key}.pkl'))
+
+    @staticmethod
+    def is_current(directory, source_path, graph_hash=None):
+        # 원본 CSV 크기/수정시각 확인. 노드 매핑으로 만든 저장소는 기록된 그래프 해시가 현재 그래프와 같아야 최신
+        if not CompactNetwork.is_current(directory, source_path):
+            return False
+        if graph_hash is None:
+            return True
+        try:
+            with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            return False
+        return meta.get('graph_sha256', graph_hash) == graph_hash
+
+    @classmethod
+    def ensure(cls, directory, source_path, graph=None, graph_hash=None):
+        # 저장소를 최신 상태로 맞춤: 최신이면 그대로, 아니면 1회 재구성. 원본이 없거나 노드 매핑에 필요한 그래프가 없으면 False
+        if cls.is_current(directory, source_path, graph_hash):
+            return True
+        if not os.path.exists(source_path):
+            return False
+        columns = pd.read_csv(source_path, nrows=0).columns
+        if graph is None and ('nearest_boarding_node' not in columns or 'nearest_arrival_node' not in columns):
+            return False
+        print('   수요 분할 저장소 구성 중 (원본 변경 시 1회)...')
+        meta = cls.build(source_path, directory, graph=graph, graph_hash=graph_hash)
+        print(f"   {meta['rows']:,}건, {len(meta['days'])}일 → {directory}")
+        return True
+
+
+class ScheduleBundle:
+    """special_transport_schedules_june_2025 일자별 근무표 CSV를 합친 월 단위 묶음: 디렉터리 안 .npy 배열 + meta.json
+
+    일자 × 차량 × 24 배열(active: 근무 여부, present: 원본 행 존재)과 일자 × 차량 배열(행 수, 0시 행의
+    work_start/work_end/actual_work_hours/service_area/식사·휴식 여부)을 메모리맵으로 읽는다. 같은 (차량, 시간)
+    행이 여러 번이면 파일 뒤쪽 행을 쓰고, 0시 행이 없는 차량은 has_header=False로 근무시각을 두지 않는다.
+    비어 있는 work_start/work_end(비번 차량 등)는 work_time_missing[..., 0/1]로 표시해 로드 시 NaN으로 돌려준다.
+    """
+    FILE_PATTERN = re.compile(r'^accurate_individual_vehicle_schedule_(\d{4})\.csv$')
+    ARRAYS = ('vehicle_ids', 'active', 'present', 'row_counts', 'has_header', 'work_start', 'work_end', 'work_time_missing',
+              'actual_work_hours', 'service_area', 'has_meal_time', 'has_break_time')
+
+    def __init__(self, directory, meta, arrays):
+        self.directory = directory
+        self.meta = meta
+        for name in self.ARRAYS:
+            setattr(self, name + '_array', arrays[name])
+        self.days = {day: d for d, day in enumerate(meta['days'])}
+        self.index = {vid: k for k, vid in enumerate(arrays['vehicle_ids'].tolist())}
+
+    @classmethod
+    def source_signature(cls, source_dir):
+        # 일자별 CSV 파일명 → [크기, 수정시각]
+        files = {}
+        for entry in os.scandir(source_dir):
+            if cls.FILE_PATTERN.match(entry.name):
+                stat = entry.stat()
+                files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+        return dict(sorted(files.items()))
+
+    @staticmethod
+    def _flag_column(df, name):
+        # 식사/휴식 여부: bool 열 그대로, 그 외는 'true' 문자열만 참 (열 없음/결측은 거짓)
+        if name not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        values = df[name]
+        if values.dtype == bool:
+            return values.to_numpy()
+        return np.array([isinstance(v, str) and v.lower() == 'true' for v in values.tolist()], dtype=bool)
+
+    @classmethod
+    def compile(cls, source_dir, directory):
+        # 한 번만 수행하는 컴파일: 임시 디렉터리에 기록 후 교체. 시뮬레이터 로더가 거부할 값은 예외
+        signature = cls.source_signature(source_dir)
+        if not signature:
+            raise FileNotFoundError(f'근무표 CSV 없음: {source_dir}')
+        frames = {cls.FILE_PATTERN.match(name).group(1): pd.read_csv(os.path.join(source_dir, name)) for name in signature}
+        days = sorted(frames)
+        parsed = {}
+        for day in days:
+            df = frames[day]
+            parsed[day] = (df['vehicle_id'].astype(int).to_numpy(), df['hour'].astype(int).to_numpy(),
+                           df['actual_work_hours'].astype(float).to_numpy())
+            if ((parsed[day][1] < 0) | (parsed[day][1] > 23)).any():
+                raise ValueError(f'{day}: 0~23 밖의 hour')
+        vehicle_ids = np.unique(np.concatenate([parsed[day][0] for day in days])).astype(np.int64)
+        shape = (len(days), len(vehicle_ids))
+        active = np.zeros(shape + (24,), dtype=bool)
+        present = np.zeros(shape + (24,), dtype=bool)
+        row_counts = np.zeros(shape, dtype=np.int32)
+        has_header = np.zeros(shape, dtype=bool)
+        actual_work_hours = np.zeros(shape, dtype=float)
+        has_meal_time = np.zeros(shape, dtype=bool)
+        has_break_time = np.zeros(shape, dtype=bool)
+        work_time_missing = np.zeros(shape + (2,), dtype=bool)
+        work_start = [[''] * shape[1] for _ in days]
+        work_end = [[''] * shape[1] for _ in days]
+        service_area = [[''] * shape[1] for _ in days]
+        for d, day in enumerate(days):
+            df = frames[day]
+            vids, hours, work_hours = parsed[day]
+            cols = np.searchsorted(vehicle_ids, vids)
+            np.add.at(row_counts[d], cols, 1)
+            # 파일 뒤쪽 행 우선
+            last = ~pd.DataFrame({'col': cols, 'hour': hours}).duplicated(keep='last').to_numpy()
+            active[d, cols[last], hours[last]] = np.asarray(parse_bool_column(df['is_active']), dtype=bool)[last]
+            present[d, cols[last], hours[last]] = True
+            header = np.flatnonzero(last & (hours == 0))
+            meal = cls._flag_column(df, 'has_meal_time')
+            rest = cls._flag_column(df, 'has_break_time')
+            starts = df['work_start'].tolist()
+            ends = df['work_end'].tolist()
+            areas = column_list(df, 'service_area', '')
+            for k in header.tolist():
+                c = int(cols[k])
+                for j, value in enumerate((starts[k], ends[k])):
+                    if isinstance(value, str):
+                        continue
+                    if not pd.isna(value):
+                        raise ValueError(f'{day}: 차량 {vids[k]} 근무시각이 문자열이 아님: {value!r}')
+                    work_time_missing[d, c, j] = True
+                has_header[d, c] = True
+                work_start[d][c] = starts[k] if isinstance(starts[k], str) else ''
+                work_end[d][c] = ends[k] if isinstance(ends[k], str) else ''
+                actual_work_hours[d, c] = work_hours[k]
+                service_area[d][c] = areas[k] if isinstance(areas[k], str) else ''
+                has_meal_time[d, c] = meal[k]
+                has_break_time[d, c] = rest[k]
+        arrays = {
+            'vehicle_ids': vehicle_ids,
+            'active': active,
+            'present': present,
+            'row_counts': row_counts,
+            'has_header': has_header,
+            'work_start': np.array(work_start, dtype=str).reshape(shape),
+            'work_end': np.array(work_end, dtype=str).reshape(shape),
+            'work_time_missing': work_time_missing,
+            'actual_work_hours': actual_work_hours,
+            'service_area': np.array(service_area, dtype=str).reshape(shape),
+            'has_meal_time': has_meal_time,
+            'has_break_time': has_break_time,
+        }
+        meta = {
+            'format': 1,
+            'days': days,
+            'vehicles': len(vehicle_ids),
+            'day_rows': {day: len(frames[day]) for day in days},
+            'sources': signature,
+        }
+        return write_directory_atomic(directory, meta, lambda tmp_dir: save_npy_arrays(tmp_dir, arrays))
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in cls.ARRAYS}
+        return cls(directory, meta, arrays)
+
+    @classmethod
+    def is_current(cls, directory, source_dir, meta=None):
+        # 원본 디렉터리의 일자별 CSV 목록/크기/수정시각이 컴파일 당시와 같은지 확인 (원본이 없으면 묶음 그대로 사용)
+        if meta is None:
+            try:
+                with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+                    meta = json.load(f)
+            except Exception:
+                return False
+        if not os.path.isdir(source_dir):
+            return True
+        return meta.get('sources') == cls.source_signature(source_dir)
+
+
+class GeoLowerBound:
+    """대권거리 / 네트워크 최고속도로 구한 최단경로 소요시간 하한
+
+    최고속도는 모든 링크의 (양 끝 노드 대권거리 / 가중치) 최댓값이므로, 삼각부등식에 의해 어떤 경로의
+    가중치 합도 (출발-도착 대권거리 / 최고속도) 이상이다. 좌표 없는 노드에 닿는 링크나 길이가 있는데
+    가중치가 0 이하인 링크가 있으면(최고속도 무한대) 하한은 0(가지치기 없음)이 된다.
+    """
+    # 부동소수점 오차로 하한이 실제 거리를 넘지 않도록 약간 축소
+    SHRINK = 1 - 1e-9
+
+    def __init__(self, node_ids, latitudes, longitudes, indptr, indices, weights, index=None):
+        self.index = index if index is not None else {node: i for i, node in enumerate(node_ids)}
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        weights = np.asarray(weights, dtype=float)
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        km = haversine_km(self.latitudes[rows], self.longitudes[rows], self.latitudes[indices], self.longitudes[indices])
+        unbounded = ~np.isfinite(km) | ((km > 0) & ~(weights > 0))
+        if unbounded.any():
+            self.km_per_minute = float('inf')
+        else:
+            moving = km > 0
+            self.km_per_minute = float((km[moving] / weights[moving]).max()) if moving.any() else 0.0
+
+    @classmethod
+    def from_graph(cls, graph, weight='weight'):
+        if isinstance(graph, CompactNetwork):
+            return cls(graph.nodes_array, graph.latitude_array, graph.longitude_array,
+                       graph.indptr_array, graph.indices_array, graph.weights_array, index=graph.index)
+        nodes, indptr, indices, weights = graph_to_csr_arrays(graph, weight)
+        lat = [graph.nodes[n].get('latitude', np.nan) for n in nodes]
+        lon = [graph.nodes[n].get('longitude', np.nan) for n in nodes]
+        return cls(nodes, lat, lon, indptr, indices, weights)
+
+    def minutes_to(self, from_nodes, to_node, cap_minutes=None):
+        # 각 출발 노드 → to_node 소요시간 하한(분). 좌표/노드가 없으면 0, cap_minutes(경로 없음 대체값)를 넘지 않음
+        bounds = np.zeros(len(from_nodes))
+        j = self.index.get(to_node)
+        if j is None or not 0 < self.km_per_minute < float('inf'):
+            return bounds
+        if isinstance(self.index, SortedNodeIndex):
+            rows = self.index.get_many(from_nodes)
+        else:
+            rows = np.array([self.index.get(n, -1) for n in from_nodes], dtype=np.int64)
+        known = rows >= 0
+        km = haversine_km(self.latitudes[rows[known]], self.longitudes[rows[known]], self.latitudes[j], self.longitudes[j])
+        bounds[known] = np.nan_to_num(km / self.km_per_minute * self.SHRINK, nan=0.0)
+        if cap_minutes is not None:
+            np.minimum(bounds, cap_minutes, out=bounds)
+        return bounds
+
+
+class CSRRouter:
+    """CSR 배열 + 노드 인덱스 기반 경로 백엔드 (scipy.sparse.csgraph, 선택 의존성)
+
+    networkx 그래프(from_graph) 또는 압축 네트워크(from_compact)에서 구성한다. 거리는 분 단위,
+    도달 불가/그래프에 없는 노드는 None(행렬은 inf)으로 돌려주며 30분 대체값은 호출 측에서 적용한다.
+    """
+    ROW_CACHE_SIZE = 32
+    MATRIX_CHUNK = 64
+
+    def __init__(self, nodes, indptr, indices, weights, index=None, reverse=None):
+        # reverse: 미리 만든 역방향 CSR (indptr, indices, weights). 없으면 전치로 계산
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra
+        self._dijkstra = dijkstra
+        self.nodes = nodes
+        self.index = index if index is not None else {node: i for i, node in enumerate(nodes)}
+        n = len(self.index)
+        self.matrix = csr_matrix((weights, indices, indptr), shape=(n, n), copy=False)
+        if reverse is not None:
+            reverse_indptr, reverse_indices, reverse_weights = reverse
+            self.reverse_matrix = csr_matrix((reverse_weights, reverse_indices, reverse_indptr), shape=(n, n), copy=False)
+        else:
+            self.reverse_matrix = self.matrix.T.tocsr()
+            self.reverse_matrix.sort_indices()
+        self._rows = OrderedDict()
+
+    @classmethod
+    def from_graph(cls, graph, weight='weight'):
+        return cls(*graph_to_csr_arrays(graph, weight))
+
+    @classmethod
+    def from_compact(cls, network):
+        return cls(network.nodes_array, network.indptr_array, network.indices_array, network.weights_array, index=network.index,
+                   reverse=(network.reverse_indptr_array, network.reverse_indices_array, network.reverse_weights_array))
+
+    @property
+    def edge_count(self):
+        return self.matrix.nnz
+
+    def _row(self, source_index):
+        # 출발 노드 전체 거리 행 (최근 ROW_CACHE_SIZE개 유지)
+        row = self._rows.get(source_index)
+        if row is None:
+            row = self._dijkstra(self.matrix, directed=True, indices=source_index)
+            self._rows[source_index] = row
+            if len(self._rows) > self.ROW_CACHE_SIZE:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(source_index)
+        return row
+
+    def path_length(self, source, target):
+        si = self.index.get(source)
+        ti = self.index.get(target)
+        if si is None or ti is None:
+            return None
+        minutes = self._row(si)[ti]
+        return float(minutes) if np.isfinite(minutes) else None
+
+    def lengths_to(self, target, sources):
+        # 역방향 그래프에서 target 기준 한 번 탐색 후, 출발 노드부터 경로 순서대로 다시 더함
+        ti = self.index.get(target)
+        if ti is None:
+            return {}
+        dist, next_hop = self._dijkstra(self.reverse_matrix, directed=True, indices=ti, return_predecessors=True)
+        lengths = {}
+        for source in sources:
+            si = self.index.get(source)
+            if si is None or not np.isfinite(dist[si]) or source in lengths:
+                continue
+            total = 0
+            node = si
+            while node != ti:
+                hop = int(next_hop[node])
+                total = total + self._edge_weight(node, hop)
+                node = hop
+            lengths[source] = total
+        return lengths
+
+    def lengths_matrix(self, nodes):
+        # nodes × nodes 분 단위 거리 (출발 노드 묶음별 다중 출발 Dijkstra)
+        result = np.full((len(nodes), len(nodes)), np.inf)
+        in_graph = [(k, self.index[node]) for k, node in enumerate(nodes) if node in self.index]
+        if not in_graph:
+            return result
+        rows_k = np.array([k for k, _ in in_graph])
+        cols_i = np.array([i for _, i in in_graph])
+        for start in range(0, len(in_graph), self.MATRIX_CHUNK):
+            chunk = slice(start, start + self.MATRIX_CHUNK)
+            dist = self._dijkstra(self.matrix, directed=True, indices=cols_i[chunk])
+            result[np.ix_(rows_k[chunk], rows_k)] = dist[:, cols_i]
+        return result
+
+    def _edge_weight(self, u, v):
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        lo, hi = indptr[u], indptr[u + 1]
+        pos = lo + int(np.searchsorted(indices[lo:hi], v))
+        return float(self.matrix.data[pos])
+
+
+class LRUPathCache:
+    """(출발, 도착) → 기본 소요초 LRU 캐시. max_entries 초과 시 가장 오래 안 쓴 구간부터 축출
+
+    get_shortest_path_time 조회 기준 적중/미스, 축출 수, 디스크 캐시 적중, 경로 계산 횟수/시간을 집계한다.
+    묶음 선조회(_prefetch_travel_times)는 조회 집계(hits + misses = get 호출 수)에 넣지 않고 prefetch_* 열로 따로 센다.
+    max_entries가 None 또는 0 이하이면 무제한.
+    """
+
+    def __init__(self, max_entries=None):
+        self._data = OrderedDict()
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.matrix_hits = 0
+        self.store_hits = 0
+        self.prefetch_lookups = 0
+        self.prefetch_store_hits = 0
+        self.prefetch_fills = 0
+        self.dijkstra_calls = 0
+        self.dijkstra_seconds = 0.0
+        self.bound_skips = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._evict()
+
+    def resize(self, max_entries):
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self._evict()
+
+    def _evict(self):
+        if self.max_entries is not None:
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def reset_stats(self):
+        # 캐시 내용은 유지하고 집계만 초기화 (같은 월드로 여러 날짜를 돌릴 때 일자별 통계용)
+        self.hits = self.misses = self.evictions = 0
+        self.matrix_hits = self.store_hits = 0
+        self.prefetch_lookups = self.prefetch_store_hits = self.prefetch_fills = 0
+        self.dijkstra_calls = 0
+        self.dijkstra_seconds = 0.0
+        self.bound_skips = 0
+
+    def record_dijkstra(self, calls, seconds):
+        self.dijkstra_calls += calls
+        self.dijkstra_seconds += seconds
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'max_entries': self.max_entries if self.max_entries is not None else 0,
+            'entries': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evictions': self.evictions,
+            'matrix_hits': self.matrix_hits,
+            'store_hits': self.store_hits,
+            'prefetch_lookups': self.prefetch_lookups,
+            'prefetch_store_hits': self.prefetch_store_hits,
+            'prefetch_fills': self.prefetch_fills,
+            'dijkstra_calls': self.dijkstra_calls,
+            'dijkstra_seconds': round(self.dijkstra_seconds, 3),
+            'bound_skips': self.bound_skips,
+        }
+
+
+class PathCacheStore:
+    """네트워크 그래프(main_network_graph.pkl) 해시별 최단경로 기본 소요초 디스크 캐시
+
+    디렉터리 구성: base.npy(출발·도착 정렬, 메모리맵 조회) + 실행별 delta_*.npy.
+    각 실행은 새로 계산한 구간만 고유 이름의 delta 파일로 원자적으로(os.replace) 기록하므로
+    동시 실행이 서로 덮어쓰지 않는다. delta가 쌓이면 잠금 파일을 잡은 실행 하나가 base로 병합한다.
+    같은 그래프에서 구간 값은 결정적이므로 병합 충돌은 없고, 병합 경합으로 빠진 구간은 다시 계산될 뿐이다.
+    노드 ID가 정수가 아닌 구간은 저장하지 않는다.
+    """
+    DTYPE = np.dtype([('src', '<i8'), ('dst', '<i8'), ('seconds', '<f8')])
+    COMPACT_THRESHOLD = 8
+    LOCK_STALE_SECONDS = 600
+
+    def __init__(self, root_dir, graph_hash):
+        self.directory = os.path.join(root_dir, graph_hash[:16])
+        self._base_src = np.zeros(0, dtype='<i8')
+        self._base_dst = np.zeros(0, dtype='<i8')
+        self._base_seconds = np.zeros(0, dtype='<f8')
+        self._delta = {}
+        self._new = {}
+
+    def __len__(self):
+        return len(self._base_src) + len(self._delta)
+
+    def load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        base_path = os.path.join(self.directory, 'base.npy')
+        if os.path.exists(base_path):
+            try:
+                base = np.load(base_path, mmap_mode='r')
+                if base.dtype == self.DTYPE:
+                    self._base_src, self._base_dst, self._base_seconds = base['src'], base['dst'], base['seconds']
+            except Exception as e:
+                print(f'   경로 캐시 base 로드 실패: {e}')
+        for path in self._delta_paths():
+            arr = self._read_shard(path)
+            if arr is not None:
+                for src, dst, seconds in arr.tolist():
+                    self._delta[(src, dst)] = seconds
+        return len(self)
+
+    def get(self, from_node, to_node):
+        if not self._is_int_node(from_node) or not self._is_int_node(to_node):
+            return None
+        seconds = self._delta.get((from_node, to_node))
+        if seconds is not None:
+            return seconds
+        src = self._base_src
+        if len(src) == 0:
+            return None
+        lo = int(np.searchsorted(src, from_node, side='left'))
+        hi = int(np.searchsorted(src, from_node, side='right'))
+        if lo == hi:
+            return None
+        j = lo + int(np.searchsorted(self._base_dst[lo:hi], to_node))
+        if j < hi and self._base_dst[j] == to_node:
+            return float(self._base_seconds[j])
+        return None
+
+    def put(self, from_node, to_node, seconds):
+        if self._is_int_node(from_node) and self._is_int_node(to_node):
+            self._new[(int(from_node), int(to_node))] = float(seconds)
+
+    def flush(self):
+        # 이번 실행에서 새로 계산한 구간을 delta 파일로 기록. 기록한 구간 수 반환
+        if not self._new:
+            return 0
+        arr = np.array([(src, dst, seconds) for (src, dst), seconds in self._new.items()], dtype=self.DTYPE)
+        name = f'delta_{os.getpid()}_{time.time_ns()}.npy'
+        try:
+            self._write_atomic(os.path.join(self.directory, name), arr)
+        except Exception as e:
+            print(f'   경로 캐시 저장 실패: {e}')
+            return 0
+        count = len(self._new)
+        self._delta.update(self._new)
+        self._new = {}
+        self.compact()
+        return count
+
+    def compact(self):
+        # delta가 COMPACT_THRESHOLD개 이상이면 base로 병합 (잠금을 못 잡으면 다음 실행에 맡김)
+        delta_paths = self._delta_paths()
+        if len(delta_paths) < self.COMPACT_THRESHOLD:
+            return False
+        lock_path = os.path.join(self.directory, 'compact.lock')
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > self.LOCK_STALE_SECONDS:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return False
+        except OSError:
+            return False
+        try:
+            os.close(fd)
+            shards = []
+            base_path = os.path.join(self.directory, 'base.npy')
+            if os.path.exists(base_path):
+                base = self._read_shard(base_path)
+                if base is not None:
+                    shards.append(base)
+            merged_paths = []
+            for path in delta_paths:
+                arr = self._read_shard(path)
+                if arr is not None:
+                    shards.append(arr)
+                    merged_paths.append(path)
+            if not shards:
+                return False
+            merged = np.concatenate(shards)
+            merged = merged[np.lexsort((merged['dst'], merged['src']))]
+            keep = np.ones(len(merged), dtype=bool)
+            keep[1:] = (merged['src'][1:] != merged['src'][:-1]) | (merged['dst'][1:] != merged['dst'][:-1])
+            self._write_atomic(base_path, merged[keep])
+            for path in merged_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return True
+        except Exception as e:
+            print(f'   경로 캐시 병합 실패: {e}')
+            return False
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+    def _delta_paths(self):
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+        return [os.path.join(self.directory, n) for n in names if n.startswith('delta_') and n.endswith('.npy')]
+
+    def _read_shard(self, path):
+        try:
+            arr = np.load(path)
+        except Exception:
+            return None
+        return arr if arr.dtype == self.DTYPE else None
+
+    @staticmethod
+    def _write_atomic(path, arr):
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, arr)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _is_int_node(node):
+        return isinstance(node, (int, np.integer)) and not isinstance(node, bool) and -(1 << 63) <= node < (1 << 63)
+
+
+class ResultCache:
+    """시나리오-일자 결과 내용 주소 캐시: (유효 설정, 입력 파일 해시, 엔진 소스 해시) → 결과 CSV 묶음
+
+    <root>/<키 앞 2자리>/<키>/ 에 결과/진행 로그/경로 캐시 집계 CSV와 meta.json(키 구성 요소, 결과 파일명)을 둔다.
+    입력은 네트워크 pkl, 차고지/차량 매핑, 당일 근무표, 시간대 속도계수, 당일 수요 분할(저장소가 최신이 아니면 수요 CSV),
+    증차 시 일정 템플릿이다. 결과에 영향이 없는 성능/저장 위치 옵션은 키에서 뺀다.
+    """
+    NEUTRAL_OPTIONS = ('results_dir', 'result_cache_dir', 'no_result_cache', 'path_cache_dir', 'no_path_cache',
+                       'path_cache_size', 'travel_matrix', 'routing_backend', 'network_format', 'alt_landmarks',
+                       'demand_store_dir', 'no_demand_store', 'schedule_bundle_dir', 'no_schedule_bundle', 'no_geo_pruning')
+    NETWORK_PATH = 'network/main_network_graph.pkl'
+    COMPACT_DIR = 'network/main_network_compact'
+    DEMAND_PATH = 'data/demand_main_network_mapped.csv'
+    SCHEDULE_DIR = 'network/special_transport_schedules_june_2025'
+    RESULT_SUFFIXES = ('', '_progress', '_path_cache')
+
+    @staticmethod
+    def is_cacheable(args):
+        # 권역 비율이 0과 1 사이면 배정마다 시드 없는 난수를 뽑으므로 결과가 키로 정해지지 않음
+        ratio = float(getattr(args, 'region_strict_ratio', 0.0) or 0.0)
+        return not getattr(args, 'no_result_cache', False) and not 0 < ratio < 1
+
+    @staticmethod
+    def engine_version():
+        # 시뮬레이터 소스 해시: 코드가 바뀌면 이전 결과를 쓰지 않음
+        return file_digest_cached(os.path.abspath(__file__))
+
+    @classmethod
+    def network_digest(cls):
+        digest = file_digest_cached(cls.NETWORK_PATH)
+        if digest is None:
+            try:
+                with open(os.path.join(cls.COMPACT_DIR, 'meta.json'), encoding='utf-8') as f:
+                    digest = json.load(f).get('graph_sha256')
+            except Exception:
+                digest = None
+        return digest
+
+    @classmethod
+    def prepare_demand(cls, args, graph=None, graph_hash=None):
+        # 키 계산 전에 수요 분할 저장소를 시뮬레이터 로더와 같은 상태로 맞춤 (키가 실행 전후로 바뀌지 않도록).
+        # 노드 매핑에 그래프가 필요한데 아직 없으면 False — 월드를 로드한 뒤 다시 호출
+        store_dir = None if args.no_demand_store else args.demand_store_dir
+        if not store_dir or not os.path.exists(cls.DEMAND_PATH):
+            return True
+        try:
+            return DemandPartitionStore.ensure(store_dir, cls.DEMAND_PATH, graph, graph_hash or cls.network_digest())
+        except Exception:
+            # 로더도 같은 이유로 실패해 CSV를 직접 읽으므로 원본 CSV 해시 키가 그대로 맞음
+            return True
+
+    @classmethod
+    def demand_digest(cls, args, date_str):
+        # 당일 분할 파일 해시 (당일 수요가 없으면 'none'). 저장소를 안 쓰거나 최신이 아니면 원본 CSV 해시
+        store_dir = None if args.no_demand_store else args.demand_store_dir
+        if store_dir and os.path.exists(cls.DEMAND_PATH) and DemandPartitionStore.is_current(store_dir, cls.DEMAND_PATH, cls.network_digest()):
+            return 'partition:' + (file_digest_cached(os.path.join(store_dir, f'{date_str}.pkl')) or 'none')
+        return 'csv:' + str(file_digest_cached(cls.DEMAND_PATH))
+
+    @classmethod
+    def key(cls, args, date_str):
+        # (키, 키 구성 요소) 반환
+        config = {k: v for k, v in sorted(vars(args).items()) if k not in cls.NEUTRAL_OPTIONS}
+        config['date'] = date_str
+        schedule_path = f"{cls.SCHEDULE_DIR}/accurate_individual_vehicle_schedule_{date_str.replace('-', '')[4:]}.csv"
+        if not os.path.exists(schedule_path):
+            schedule_path = 'network/accurate_individual_vehicle_schedule.csv'
+        inputs = {
+            'network': cls.network_digest(),
+            'depots': file_digest_cached('network/depot_main_network_mapping_fixed.csv'),
+            'vehicles': file_digest_cached('network/fixed_vehicle_mapping_63.csv'),
+            'schedule': file_digest_cached(schedule_path),
+            'speed_factors': file_digest_cached('data/hourly_speed_factors.csv'),
+            'demand': cls.demand_digest(args, date_str),
+            'template': file_digest_cached(args.schedule_csv) if args.increasing else None,
+        }
+        components = {'config': config, 'inputs': inputs, 'engine': cls.engine_version()}
+        payload = json.dumps(components, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest(), components
+
+    @staticmethod
+    def entry_dir(root, key):
+        return os.path.join(root, key[:2], key)
+
+    @classmethod
+    def restore(cls, root, key, results_dir):
+        # 적중 시 결과 CSV들을 results_dir로 복사하고 결과 파일 경로 반환, 없으면 None
+        entry = cls.entry_dir(root, key)
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            os.makedirs(results_dir, exist_ok=True)
+            for name in meta['files']:
+                shutil.copyfile(os.path.join(entry, name), os.path.join(results_dir, name))
+        except Exception:
+            return None
+        return os.path.join(results_dir, meta['output'])
+
+    @classmethod
+    def store(cls, root, key, components, output_file):
+        # 결과 CSV와 같은 이름의 진행 로그/경로 캐시 집계까지 임시 디렉터리에 복사한 뒤 교체
+        base = os.path.splitext(os.path.basename(output_file))[0]
+        source_dir = os.path.dirname(output_file)
+        files = [f'{base}{suffix}.csv' for suffix in cls.RESULT_SUFFIXES
+                 if os.path.exists(os.path.join(source_dir, f'{base}{suffix}.csv'))]
+        if os.path.basename(output_file) not in files:
+            return False
+        meta = {'key': key, 'output': os.path.basename(output_file), 'files': files,
+                'created': datetime.now().isoformat(timespec='seconds'), **components}
+
+        def copy_results(tmp_dir):
+            for name in files:
+                shutil.copyfile(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+
+        try:
+            write_directory_atomic(cls.entry_dir(root, key), meta, copy_results)
+        except OSError as e:
+            print(f'   결과 캐시 저장 실패: {e}')
+            return False
+        return True
+
+
 class ScheduledIncreaseWithShiftSimulation:
+    # 날짜와 무관해 reset_day 후에도 유지하는 속성 (네트워크, 경로 캐시/백엔드, 차고지, 기본 차량 스냅샷)
+    WORLD_ATTRIBUTES = ('network_graph', 'network_hash', 'depot_info', 'path_cache', 'path_store', 'csr_router',
+                        'alt_index', 'geo_bound', 'demand_store_dir', 'schedule_bundle_dir', '_schedule_bundle',
+                        '_base_vehicles')
+
     def __init__(self):
         self.vehicles = {}
         self.passengers = {}
         self.network_graph = None
         self.depot_info = {}
-        self.pending_passengers = deque()
+        self.pending_passengers = PendingPassengerQueue()
+        # 요청 시각 순 도착 큐와 커서 (load_daily_demands에서 구성)
+        self.arrival_queue = []
+        self.arrival_cursor = 0
+        # 상태별 차량 인덱스 / service_end_time 최소 힙 (run_simulation 시작 시 구성)
+        self.vehicle_status_index = {status: set() for status in VehicleStatus}
+        self.vehicle_order = {}
+        self.completion_heap = []
+        self._completion_seq = 0
+        self._duty_hour = None
+        self._state_version = 0
+        # 차량 × 시간대 배열 (self.vehicles 순서, run_simulation 시작 시 구성)
+        self.fleet_vehicles = []
+        self.fleet_schedule = np.zeros((0, 24), dtype=bool)
+        self.fleet_next_active = np.zeros((0, 24), dtype=bool)
+        self.fleet_work_end_hour = np.zeros(0, dtype=int)
+        self.fleet_inside_only = np.zeros(0, dtype=bool)
+        self.fleet_idle = np.zeros(0, dtype=bool)
+        self._fleet_last_hour = np.zeros((24, 0), dtype=bool)
+        self._fleet_hour_ok = np.zeros((24, 0), dtype=bool)
+        # 진행 스냅샷용 증분 카운터: 상태 전이/정시 경계/점심창 경계에서만 갱신
+        self.current_second = 0
+        self.progress_counters = dict.fromkeys(PROGRESS_COUNTER_KEYS, 0)
+        self._vehicle_progress_flags = {}
+        # 점심창 인덱스: 경계 초 정렬 목록 + 차량별 현재 겹친 점심창 수 (_lunch_clock 초 기준)
+        self._lunch_edge_events = []
+        self._lunch_edge_cursor = 0
+        self._lunch_clock = None
+        self.fleet_lunch_depth = np.zeros(0, dtype=int)
+        self.passenger_status_counts = defaultdict(int)
         self.service_records = []
         self.demand_call_log = []
+        # demand_id → demand_call_log 내 첫 기록 위치 (픽업/하차 갱신 대상)
+        self.demand_call_index = {}
         self.vehicle_service_log = defaultdict(list)
-        self.path_cache = {}
+        # 경로 기본 소요초 LRU 캐시 (set_path_cache_size로 크기 제한)
+        self.path_cache = LRUPathCache()
+        # 실행 간 공유 경로 캐시 (enable_path_store로 활성화)
+        self.network_hash = None
+        self.path_store = None
+        # 당일 이동시간 행렬 (build_travel_matrix로 구성): 노드 → 행/열 인덱스, 기본 소요초
+        self.matrix_index = {}
+        self.travel_matrix = np.zeros((0, 0), dtype=float)
+        # 선택 경로 백엔드 (enable_csr_backend로 활성화, 없으면 networkx)
+        self.csr_router = None
+        # networkx 백엔드의 캐시 미스 구간용 ALT 인덱스 (enable_alt_index로 활성화)
+        self.alt_index = None
+        # 날짜별 수요 분할 저장소 디렉터리 (None이면 수요 CSV 직접 읽기)
+        self.demand_store_dir = 'data/demand_partitions'
+        # 월 근무표 묶음 디렉터리 (None이면 일자별 CSV 직접 읽기)와 로드한 묶음
+        self.schedule_bundle_dir = 'network/special_transport_schedules_june_2025.bundle'
+        self._schedule_bundle = None
+        # 배정 후보 가지치기용 대권거리 하한 (enable_geo_pruning으로 활성화)
+        self.geo_bound = None
         self.assigned_demands = set()
         self.simulation_start_time = None
         self.total_seconds = 0
@@ -138,11 +1613,16 @@ class ScheduledIncreaseWithShiftSimulation:
             return self._ensure_csv_path(path)
 
     # --- 공통 로드 함수들 ---
-    def load_network(self):
+    def load_network(self, network_format='pickle'):
         print('네트워크 로드 중...')
+        if network_format == 'compact':
+            if self._load_compact_network():
+                return True
+            print('   압축 형식 사용 불가, pickle 로드')
         try:
             with open('network/main_network_graph.pkl', 'rb') as f:
                 self.network_graph = pickle.load(f)
+            self.network_hash = file_digest_cached('network/main_network_graph.pkl')
             print(f'   노드: {self.network_graph.number_of_nodes():,}개')
             print(f'   링크: {self.network_graph.number_of_edges():,}개')
             return True
@@ -150,16 +1630,135 @@ class ScheduledIncreaseWithShiftSimulation:
             print(f'   실패: {e}')
             return False
 
+    def _load_compact_network(self, directory='network/main_network_compact', source_path='network/main_network_graph.pkl'):
+        # 압축 형식(메모리맵) 로드. 없거나 원본이 바뀌었으면 pkl에서 한 번 변환. 경로 계산은 CSR 백엔드
+        load_start = time.time()
+        try:
+            if not CompactNetwork.is_current(directory, source_path, CompactNetwork.FORMAT):
+                if not os.path.exists(source_path):
+                    return False
+                print('   압축 형식 변환 중 (원본 변경 시 1회)...')
+                with open(source_path, 'rb') as f:
+                    CompactNetwork.convert(pickle.load(f), directory, source_path=source_path)
+            network = CompactNetwork.load(directory)
+            router = CSRRouter.from_compact(network)
+        except Exception as e:
+            print(f'   압축 형식 로드 실패: {e}')
+            return False
+        self.network_graph = network
+        self.network_hash = network.meta.get('graph_sha256')
+        self.csr_router = router
+        print(f'   노드: {network.number_of_nodes():,}개')
+        print(f'   링크: {network.number_of_edges():,}개')
+        print(f'   압축 형식 로드: {directory} ({time.time() - load_start:.3f}초, CSR 경로 백엔드)')
+        return True
+
+    def set_path_cache_size(self, max_entries):
+        # 메모리 상한: 구간 수 기준 (0 이하 = 무제한). 기존 항목과 집계는 유지
+        self.path_cache.resize(max_entries)
+        return self.path_cache.max_entries
+
+    def enable_path_store(self, root_dir='network/path_cache'):
+        # 그래프 해시별 디스크 경로 캐시 연결 (load_network 이후)
+        if not self.network_hash:
+            return False
+        try:
+            store = PathCacheStore(root_dir, self.network_hash)
+            count = store.load()
+        except Exception as e:
+            print(f'   경로 캐시 사용 불가: {e}')
+            return False
+        self.path_store = store
+        print(f'   경로 캐시: {count:,}개 구간 ({store.directory})')
+        return True
+
+    def enable_csr_backend(self):
+        # scipy.sparse.csgraph 기반 CSR 경로 백엔드로 전환 (scipy 없으면 networkx 유지)
+        if self.csr_router is not None:
+            return True
+        if self.network_graph is None:
+            return False
+        print('CSR 경로 백엔드 구성 중...')
+        build_start = time.time()
+        try:
+            self.csr_router = CSRRouter.from_graph(self.network_graph)
+        except Exception as e:
+            print(f'   실패, networkx 사용: {e}')
+            self.csr_router = None
+            return False
+        print(f'   노드: {len(self.csr_router.nodes):,}개, 링크: {self.csr_router.edge_count:,}개, 소요: {time.time() - build_start:.1f}초')
+        return True
+
+    def enable_alt_index(self, landmark_count=8, network_dir='network'):
+        # 그래프 옆 network/main_network_graph.alt_<해시>.npz 를 읽거나, 없으면 구성 후 저장
+        if self.network_graph is None or not self.network_hash or landmark_count <= 0:
+            return False
+        if self.csr_router is not None:
+            print('ALT 인덱스 생략: CSR 경로 백엔드 사용 중')
+            return False
+        path = os.path.join(network_dir, f'main_network_graph.alt_{self.network_hash[:16]}_{landmark_count}.npz')
+        build_start = time.time()
+        try:
+            if os.path.exists(path):
+                self.alt_index = ALTIndex.load(path, self.network_graph)
+                print(f'ALT 인덱스 로드: 랜드마크 {len(self.alt_index.landmarks)}개 ({path})')
+                return True
+        except Exception as e:
+            print(f'   ALT 인덱스 로드 실패, 재구성: {e}')
+        print('ALT 인덱스 구성 중...')
+        try:
+            self.alt_index = ALTIndex.build(self.network_graph, landmark_count)
+        except Exception as e:
+            print(f'   실패: {e}')
+            self.alt_index = None
+            return False
+        try:
+            self.alt_index.save(path)
+        except Exception as e:
+            print(f'   저장 실패: {e}')
+        print(f'   랜드마크: {len(self.alt_index.landmarks)}개, 소요: {time.time() - build_start:.1f}초')
+        return True
+
+    def enable_geo_pruning(self):
+        # 노드 위경도 + 링크 최고속도로 픽업 소요시간 하한 구성 (좌표가 없거나 최고속도를 못 구하면 끔)
+        if self.network_graph is None:
+            return False
+        try:
+            bound = GeoLowerBound.from_graph(self.network_graph)
+        except Exception as e:
+            print(f'   대권거리 하한 구성 실패: {e}')
+            return False
+        if not 0 < bound.km_per_minute < float('inf'):
+            print('대권거리 하한 생략: 노드 좌표/링크 가중치로 최고속도를 구할 수 없음')
+            return False
+        self.geo_bound = bound
+        print(f'대권거리 하한: 네트워크 최고속도 {bound.km_per_minute * 60:.1f}km/h')
+        return True
+
+    def snapshot_world(self):
+        # load_vehicles 직후 기본 차량 상태 보관 (reset_day에서 날짜마다 복원)
+        self._base_vehicles = copy.deepcopy(self.vehicles)
+
+    def reset_day(self):
+        # 월드 속성만 남기고 일자별 상태를 새 인스턴스와 같게 초기화. 경로 캐시 내용은 유지, 집계만 초기화
+        world = {name: getattr(self, name) for name in self.WORLD_ATTRIBUTES if hasattr(self, name)}
+        self.__dict__.clear()
+        self.__init__()
+        self.__dict__.update(world)
+        self.vehicles = copy.deepcopy(world.get('_base_vehicles', {}))
+        self.path_cache.reset_stats()
+
     def load_depot_info(self):
         print('차고지 정보 로드 중...')
         try:
-            depot_df = pd.read_csv('network/depot_main_network_mapping_fixed.csv')
-            for _, row in depot_df.iterrows():
-                depot_name = row['region_name']
+            depot_df = read_csv_cached('network/depot_main_network_mapping_fixed.csv')
+            for depot_name, node_id, lat, lon, vehicles in zip(depot_df['region_name'].tolist(), depot_df['nearest_node'].tolist(),
+                                                               depot_df['latitude'].tolist(), depot_df['longitude'].tolist(),
+                                                               column_list(depot_df, 'vehicles', 10)):
                 self.depot_info[depot_name] = {
-                    'node_id': row['nearest_node'],
-                    'coordinates': (row['latitude'], row['longitude']),
-                    'vehicles': row.get('vehicles', 10)
+                    'node_id': node_id,
+                    'coordinates': (lat, lon),
+                    'vehicles': vehicles
                 }
             print(f'   차고지: {len(self.depot_info)}개')
             return True
@@ -170,12 +1769,12 @@ class ScheduledIncreaseWithShiftSimulation:
     def load_hourly_speed_factors(self, csv_path='data/hourly_speed_factors.csv'):
         try:
             if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
+                df = read_csv_cached(csv_path)
                 loaded = 0
-                for _, row in df.iterrows():
+                for hour, factor in zip(df['hour'].tolist(), df['factor'].tolist()):
                     try:
-                        hour = int(row['hour'])
-                        factor = float(row['factor'])
+                        hour = int(hour)
+                        factor = float(factor)
                         if 0 <= hour <= 23 and factor > 0:
                             self.hourly_speed_factors[hour] = factor
                             loaded += 1
@@ -190,12 +1789,10 @@ class ScheduledIncreaseWithShiftSimulation:
     def load_vehicles(self):
         print('기본 63대 차량 로드 중...')
         try:
-            vehicle_mapping = pd.read_csv('network/fixed_vehicle_mapping_63.csv')
+            vehicle_mapping = read_csv_cached('network/fixed_vehicle_mapping_63.csv')
+            vehicle_ids = vehicle_mapping['vehicle_id'].astype(int).tolist()
             depot_vehicle_count = defaultdict(int)
-            for _, row in vehicle_mapping.iterrows():
-                vehicle_id = int(row['vehicle_id'])
-                vehicle_no = row['vehicle_no']
-                depot_name = row['depot']
+            for vehicle_id, vehicle_no, depot_name in zip(vehicle_ids, vehicle_mapping['vehicle_no'].tolist(), vehicle_mapping['depot'].tolist()):
                 if depot_name not in self.depot_info:
                     continue
                 depot_location = Location(self.depot_info[depot_name]['node_id'])
@@ -287,7 +1884,7 @@ class ScheduledIncreaseWithShiftSimulation:
             print(f'   일정 템플릿 파일이 없습니다: {csv_path} (추가 차량 없음)')
             return True
         try:
-            df = pd.read_csv(csv_path)
+            df = read_csv_cached(csv_path)
         except Exception as e:
             print(f'   템플릿 로드 실패: {e}')
             return False
@@ -314,34 +1911,44 @@ class ScheduledIncreaseWithShiftSimulation:
         max_vehicle_id = max(self.vehicles.keys()) if self.vehicles else 0
         added = 0
 
-        for _, row in df.iterrows():
-            depot_name = str(row[depot_col]).strip()
-            if depot_name not in self.depot_info:
-                continue
-
-            weekday_spec = self._normalize_weekday(row[weekday_col])
-            if weekday_spec is None:
-                continue
-            if weekday_spec >= 0 and weekday_spec != target_weekday:
-                continue
-            if weekday_spec == -1 and target_weekday >= 5:
-                continue
-            if weekday_spec == -2 and target_weekday < 5:
-                continue
-
-            start_str, start_hour = self._parse_time_str(row[start_col])
-            end_str, end_hour = self._parse_time_str(row[end_col])
+        def vehicle_count(value):
             try:
-                num_vehicles = int(row[count_col])
-                num_vehicles = max(0, num_vehicles)
+                return max(0, int(value))
             except Exception:
-                num_vehicles = 0
-            service_area = str(row[area_col]).strip().upper() if area_col else 'BOTH'
-            if service_area not in ['BOTH', 'INSIDE_ONLY']:
-                service_area = 'BOTH'
+                return 0
+
+        # 열 단위 변환 후 (차고지, 요일, 대수) 조건을 만족하는 행만 차량 생성 (시각 문자열은 값별 1회 파싱)
+        depot_names = [str(v).strip() for v in df[depot_col].tolist()]
+        weekday_specs = [self._normalize_weekday(v) for v in df[weekday_col].tolist()]
+        counts = [vehicle_count(v) for v in df[count_col].tolist()]
+        areas = [str(v).strip().upper() for v in df[area_col].tolist()] if area_col else ['BOTH'] * len(df)
+        # 빈 칸(NaN)은 값 비교가 안 되므로 _parse_time_str과 같은 정규화 문자열을 키로 사용
+        starts = [str(v).strip() for v in df[start_col].tolist()]
+        ends = [str(v).strip() for v in df[end_col].tolist()]
+        parsed_times = {}
+        for value in starts + ends:
+            if value not in parsed_times:
+                parsed_times[value] = self._parse_time_str(value)
+
+        def weekday_matches(spec):
+            if spec is None:
+                return False
+            if spec >= 0:
+                return spec == target_weekday
+            if spec == -1:
+                return target_weekday < 5
+            if spec == -2:
+                return target_weekday >= 5
+            return True
 
-            if num_vehicles <= 0:
+        for depot_name, weekday_spec, start_value, end_value, num_vehicles, service_area in zip(
+                depot_names, weekday_specs, starts, ends, counts, areas):
+            if depot_name not in self.depot_info or not weekday_matches(weekday_spec) or num_vehicles <= 0:
                 continue
+            start_str, start_hour = parsed_times[start_value]
+            end_str, end_hour = parsed_times[end_value]
+            if service_area not in ['BOTH', 'INSIDE_ONLY']:
+                service_area = 'BOTH'
 
             depot_node = self.depot_info[depot_name]['node_id']
             for _ in range(num_vehicles):
@@ -385,7 +1992,7 @@ class ScheduledIncreaseWithShiftSimulation:
     def log_demand_call_result(self, passenger, result_type, vehicle_id=None, assignment_time=None):
         call_record = {
             'demand_id': passenger.demand_id,
-            'call_time': passenger.request_time,
+            'call_time': passenger.request_second,
             'result_type': result_type,
             'assignment_time': assignment_time,
             'vehicle_id': vehicle_id,
@@ -394,23 +2001,26 @@ class ScheduledIncreaseWithShiftSimulation:
             'wait_minutes': None,
             'service_minutes': None
         }
-        if assignment_time and passenger.request_time:
-            wait_seconds = (assignment_time - passenger.request_time).total_seconds()
+        if assignment_time is not None and passenger.request_second is not None:
+            wait_seconds = assignment_time - passenger.request_second
             call_record['wait_minutes'] = wait_seconds / 60.0
+        self.demand_call_index.setdefault(passenger.demand_id, len(self.demand_call_log))
         self.demand_call_log.append(call_record)
         return len(self.demand_call_log) - 1
 
     def update_demand_log(self, demand_id, pickup_time=None, dropoff_time=None):
-        for record in self.demand_call_log:
-            if record['demand_id'] == demand_id:
-                if pickup_time:
-                    record['pickup_time'] = pickup_time
-                if dropoff_time:
-                    record['dropoff_time'] = dropoff_time
-                if record['pickup_time'] and record['dropoff_time']:
-                    service_seconds = (record['dropoff_time'] - record['pickup_time']).total_seconds()
-                    record['service_minutes'] = service_seconds / 60.0
-                break
+        # 해당 수요의 첫 기록(대기 후 배정이면 WAITING 기록)을 갱신
+        idx = self.demand_call_index.get(demand_id)
+        if idx is None:
+            return
+        record = self.demand_call_log[idx]
+        if pickup_time is not None:
+            record['pickup_time'] = pickup_time
+        if dropoff_time is not None:
+            record['dropoff_time'] = dropoff_time
+        if record['pickup_time'] is not None and record['dropoff_time'] is not None:
+            service_seconds = record['dropoff_time'] - record['pickup_time']
+            record['service_minutes'] = service_seconds / 60.0
 
     def log_vehicle_service(self, vehicle_id, action, passenger_id=None, current_time=None):
         service_record = {
@@ -422,10 +2032,13 @@ class ScheduledIncreaseWithShiftSimulation:
 
     # --- 점심시간 조정 관련 ---
     def _is_in_lunch_break(self, vehicle, current_time):
-        if not hasattr(vehicle, 'lunch_windows') or not vehicle.lunch_windows:
+        # 진행 중인 초는 점심창 인덱스(fleet_lunch_depth)로 O(1) 조회
+        if current_time == self._lunch_clock:
+            return self.fleet_lunch_depth[self.vehicle_order[vehicle.vehicle_id]] > 0
+        if not getattr(vehicle, 'lunch_seconds', None):
             return False
-        for start_dt, end_dt in vehicle.lunch_windows:
-            if start_dt <= current_time < end_dt:
+        for start_s, end_s in vehicle.lunch_seconds:
+            if start_s <= current_time < end_s:
                 return True
         return False
 
@@ -590,7 +2203,6 @@ class ScheduledIncreaseWithShiftSimulation:
             vehicle = self.vehicles[vehicle_id]
             # 간단한 가상 서비스 부여로 새벽 서비스 중 상태 보장
             fake_start_time = datetime(prev_date.year, prev_date.month, prev_date.day, 23, 0, 0)
-            fake_end_time = datetime(target_date.year, target_date.month, target_date.day, 1, 0, 0)
             vehicle.assigned_passenger = Passenger(
                 demand_id=f"PREV_DAY_{prev_date.strftime('%d')}_{vehicle_id}_2300",
                 pickup_location=vehicle.depot_location,
@@ -599,44 +2211,100 @@ class ScheduledIncreaseWithShiftSimulation:
                 customer_id=f"FAKE_CUSTOMER_{vehicle_id}",
                 mode='특별교통수단'
             )
+            # 시뮬레이션 시계 기준: 전날 23시 = -1시간, 당일 01시 종료
+            vehicle.assigned_passenger.request_second = -SECONDS_PER_HOUR
             vehicle.status = VehicleStatus.TRAVELING_TO_DROPOFF
-            vehicle.service_end_time = fake_end_time
+            vehicle.service_end_time = 1 * SECONDS_PER_HOUR
             continuous_operation_vehicles += 1
         if continuous_operation_vehicles > 0:
             print(f'   {prev_date.strftime("%d일")}부터 연속 운행 중인 차량: {continuous_operation_vehicles}대')
             print(f'   {target_date.strftime("%d일")} 새벽 서비스 가능 차량 확보 완료')
 
+    def _apply_schedule_rows(self, schedule_df):
+        # 근무표 행을 차량에 반영, 반영한 행 수 반환. 열 단위 형 변환 (변환 불가 값이 있으면 예외 → 기본 스케줄)
+        vehicle_ids = schedule_df['vehicle_id'].astype(int).to_numpy()
+        hours = schedule_df['hour'].astype(int).to_numpy()
+        actual_work_hours = schedule_df['actual_work_hours'].astype(float).tolist()
+        is_active = parse_bool_column(schedule_df['is_active'])
+        work_starts = schedule_df['work_start'].tolist()
+        work_ends = schedule_df['work_end'].tolist()
+        known = np.fromiter((vid in self.vehicles for vid in vehicle_ids.tolist()), dtype=bool, count=len(vehicle_ids))
+        # 같은 (차량, 시간)이 여러 번 나오면 파일 뒤쪽 행이 우선 (행 순서대로 반영)
+        for k in np.flatnonzero(known).tolist():
+            vehicle = self.vehicles[int(vehicle_ids[k])]
+            hour = int(hours[k])
+            vehicle.accurate_schedule[hour] = is_active[k]
+            if hour == 0:
+                vehicle.work_start = work_starts[k]
+                vehicle.work_end = work_ends[k]
+                vehicle.actual_work_hours = actual_work_hours[k]
+        return int(known.sum())
+
+    def _load_schedule_bundle(self, source_dir):
+        # 월 근무표 묶음 (없거나 일자별 CSV가 바뀌었으면 1회 컴파일). 같은 프로세스에서는 로드한 묶음 재사용, 사용 불가면 None
+        directory = self.schedule_bundle_dir
+        if not directory:
+            return None
+        try:
+            bundle = self._schedule_bundle
+            if bundle is not None and bundle.directory == directory and ScheduleBundle.is_current(directory, source_dir, bundle.meta):
+                return bundle
+            if not ScheduleBundle.is_current(directory, source_dir):
+                if not os.path.isdir(source_dir):
+                    return None
+                print('   월 근무표 묶음 컴파일 중 (일자별 CSV 변경 시 1회)...')
+                meta = ScheduleBundle.compile(source_dir, directory)
+                print(f"   {len(meta['days'])}일 × {meta['vehicles']}대 → {directory}")
+            self._schedule_bundle = ScheduleBundle.load(directory)
+            return self._schedule_bundle
+        except Exception as e:
+            print(f'   월 근무표 묶음 사용 불가, 일자별 CSV 사용: {e}')
+            return None
+
+    def _apply_schedule_bundle(self, bundle, day):
+        # 묶음의 해당 일자 슬라이스로 차량 근무표를 한 번에 채움 (_apply_schedule_rows와 같은 결과), 반영한 행 수 반환
+        d = bundle.days[day]
+        vehicle_ids = [vid for vid in self.vehicles if vid in bundle.index]
+        if not vehicle_ids:
+            return 0
+        cols = np.array([bundle.index[vid] for vid in vehicle_ids], dtype=np.int64)
+        active = bundle.active_array[d, cols].tolist()
+        present = bundle.present_array[d, cols].tolist()
+        has_header = bundle.has_header_array[d, cols].tolist()
+        work_start = bundle.work_start_array[d, cols].tolist()
+        work_end = bundle.work_end_array[d, cols].tolist()
+        missing = bundle.work_time_missing_array[d, cols].tolist()
+        actual_work_hours = bundle.actual_work_hours_array[d, cols].tolist()
+        for k, vid in enumerate(vehicle_ids):
+            vehicle = self.vehicles[vid]
+            schedule = vehicle.accurate_schedule
+            for hour, (is_present, is_active) in enumerate(zip(present[k], active[k])):
+                if is_present:
+                    schedule[hour] = is_active
+            if has_header[k]:
+                vehicle.work_start = np.nan if missing[k][0] else work_start[k]
+                vehicle.work_end = np.nan if missing[k][1] else work_end[k]
+                vehicle.actual_work_hours = actual_work_hours[k]
+        return int(bundle.row_counts_array[d, cols].sum())
+
     def load_accurate_schedules(self, date_str="2025-06-23"):
         print('정확한 차량 스케줄 로드 중...')
         try:
             date_suffix = date_str.replace('-', '')[4:]
-            special_schedule_path = f'network/special_transport_schedules_june_2025/accurate_individual_vehicle_schedule_{date_suffix}.csv'
-            try:
-                schedule_df = pd.read_csv(special_schedule_path)
-                print(f'특별교통수단 스케줄 로드: {date_str} ({len(schedule_df)}건)')
-            except FileNotFoundError as e:
-                print(f'날짜별 스케줄 파일 없음, 기본 파일 사용: {e}')
-                schedule_df = pd.read_csv('network/accurate_individual_vehicle_schedule.csv')
-            updated_count = 0
-            for _, row in schedule_df.iterrows():
-                vehicle_id = int(row['vehicle_id'])
-                hour = int(row['hour'])
-                is_active = row['is_active']
-                work_start = row['work_start']
-                work_end = row['work_end']
-                actual_work_hours = float(row['actual_work_hours'])
-                if isinstance(is_active, str):
-                    is_active = is_active.lower() == 'true'
-                else:
-                    is_active = bool(is_active)
-                if vehicle_id in self.vehicles:
-                    vehicle = self.vehicles[vehicle_id]
-                    vehicle.accurate_schedule[hour] = is_active
-                    if hour == 0:
-                        vehicle.work_start = work_start
-                        vehicle.work_end = work_end
-                        vehicle.actual_work_hours = actual_work_hours
-                    updated_count += 1
+            schedule_dir = 'network/special_transport_schedules_june_2025'
+            special_schedule_path = f'{schedule_dir}/accurate_individual_vehicle_schedule_{date_suffix}.csv'
+            bundle = self._load_schedule_bundle(schedule_dir)
+            if bundle is not None and date_suffix in bundle.days:
+                print(f"특별교통수단 스케줄 로드: {date_str} ({bundle.meta['day_rows'][date_suffix]}건)")
+                updated_count = self._apply_schedule_bundle(bundle, date_suffix)
+            else:
+                try:
+                    schedule_df = read_csv_cached(special_schedule_path)
+                    print(f'특별교통수단 스케줄 로드: {date_str} ({len(schedule_df)}건)')
+                except FileNotFoundError as e:
+                    print(f'날짜별 스케줄 파일 없음, 기본 파일 사용: {e}')
+                    schedule_df = read_csv_cached('network/accurate_individual_vehicle_schedule.csv')
+                updated_count = self._apply_schedule_rows(schedule_df)
             # end-exclusive 보정
             for vehicle_id, vehicle in self.vehicles.items():
                 try:
@@ -760,32 +2428,39 @@ class ScheduledIncreaseWithShiftSimulation:
     def load_daily_demands(self, date_str):
         print(f'{date_str} 특별교통수단 수요 로드 중...')
         try:
-            demand_df = pd.read_csv('data/demand_main_network_mapped.csv')
-            demand_df['receipt_time'] = pd.to_datetime(demand_df['receipt_time'])
-            daily_special = demand_df[(demand_df['receipt_time'].dt.date == pd.to_datetime(date_str).date()) & (demand_df['mode'] == '특별교통수단')].copy()
+            daily_special = self._load_demand_partition(date_str)
+            if daily_special is None:
+                demand_df = read_csv_cached('data/demand_main_network_mapped.csv')
+                demand_df['receipt_time'] = pd.to_datetime(demand_df['receipt_time'])
+                daily_special = demand_df[(demand_df['receipt_time'].dt.date == pd.to_datetime(date_str).date()) & (demand_df['mode'] == '특별교통수단')].copy()
+                if 'nearest_boarding_node' not in daily_special.columns or 'nearest_arrival_node' not in daily_special.columns:
+                    # 좌표만 있는 수요 파일: 당일분만 최근접 노드로 매핑
+                    print('   노드 열 없음: 출발/도착 좌표를 최근접 노드로 매핑')
+                    daily_special = NearestNodeMapper.from_graph(self.network_graph).map_dataframe(daily_special)
+                daily_special['is_outside_area'] = DemandPartitionStore.outside_area_flags(daily_special)
             daily_special = daily_special.sort_values('receipt_time')
             print(f'   원본 {date_str} 특별교통수단: {len(daily_special)}건')
-            outside_area_count = 0
-            for i, (_, row) in enumerate(daily_special.iterrows()):
-                customer_id = row['customer_id']
+            outside_flags = daily_special['is_outside_area'].astype(bool).tolist()
+            outside_area_count = sum(outside_flags)
+            columns = zip(daily_special['customer_id'].tolist(), daily_special['receipt_time'].tolist(),
+                          daily_special['nearest_boarding_node'].tolist(), daily_special['nearest_arrival_node'].tolist(),
+                          daily_special['mode'].tolist(), outside_flags,
+                          column_list(daily_special, 'pickup_depot_name'), column_list(daily_special, 'dropoff_depot_name'))
+            for i, (customer_id, receipt_time, boarding_node, arrival_node, mode, is_outside_area, pickup_depot, dropoff_depot) in enumerate(columns):
                 unique_demand_id = f"{customer_id}_june23_{i+1:03d}"
-                origin_area = str(row.get('origin1', ''))
-                destination_area = str(row.get('destination1', ''))
-                is_outside_area = (origin_area != '경기도 화성시') or (destination_area != '경기도 화성시')
-                if is_outside_area:
-                    outside_area_count += 1
                 passenger = Passenger(
                     demand_id=unique_demand_id,
                     customer_id=customer_id,
-                    request_time=row['receipt_time'],
-                    pickup_location=Location(row['nearest_boarding_node']),
-                    dropoff_location=Location(row['nearest_arrival_node']),
-                    mode=row['mode'],
+                    request_time=receipt_time,
+                    pickup_location=Location(boarding_node),
+                    dropoff_location=Location(arrival_node),
+                    mode=mode,
                     is_outside_area=is_outside_area,
-                    pickup_depot_name=row.get('pickup_depot_name', None),
-                    dropoff_depot_name=row.get('dropoff_depot_name', None)
+                    pickup_depot_name=pickup_depot,
+                    dropoff_depot_name=dropoff_depot
                 )
                 self.passengers[unique_demand_id] = passenger
+            self._build_arrival_queue()
             print(f'   로드된 승객: {len(self.passengers)}명')
             print(f'   관외 지역 포함 여행: {outside_area_count}건')
             print(f'   관내 전용 여행: {len(self.passengers) - outside_area_count}건')
@@ -809,81 +2484,359 @@ class ScheduledIncreaseWithShiftSimulation:
                     mode='특별교통수단'
                 )
                 self.passengers[demand_id] = passenger
+            self._build_arrival_queue()
             print(f'   샘플 승객: {len(self.passengers)}명 생성')
             return True
 
-    def get_shortest_path_time(self, from_node, to_node, current_time=None):
-        cache_key = (from_node, to_node)
+    def _load_demand_partition(self, date_str, source_path='data/demand_main_network_mapped.csv'):
+        # 날짜별 분할 저장소에서 당일분만 읽음. 없거나 원본이 바뀌었으면 1회 재구성, 사용 불가면 None(CSV 직접 읽기)
+        if not self.demand_store_dir:
+            return None
         try:
-            if current_time is not None:
-                hour = int(getattr(current_time, 'hour'))
-            else:
+            if not DemandPartitionStore.ensure(self.demand_store_dir, source_path, self.network_graph, self.network_hash):
+                return None
+            return DemandPartitionStore.load_day(self.demand_store_dir, date_str)
+        except Exception as e:
+            print(f'   수요 분할 저장소 사용 불가, CSV 직접 읽기: {e}')
+            return None
+
+    def _build_arrival_queue(self):
+        # 요청 시각 순 정렬(동일 시각은 로드 순서 유지), 커서는 처음으로
+        self.arrival_queue = sorted(self.passengers.values(), key=lambda p: p.request_time)
+        self.arrival_cursor = 0
+
+    def _pop_arrived_passengers(self, current_time):
+        # 커서 이후 request_time <= current_time 인 신규 도착 승객만 반환
+        queue = self.arrival_queue
+        start = self.arrival_cursor
+        idx = start
+        while idx < len(queue) and queue[idx].request_second <= current_time:
+            idx += 1
+        self.arrival_cursor = idx
+        return queue[start:idx]
+
+    def _speed_scale(self, current_time=None):
+        # 기본 소요초에 곱할 시간대 속도계수 배율
+        try:
+            if current_time is None:
                 hour = int(self._routing_hour)
+            elif hasattr(current_time, 'hour'):
+                hour = int(current_time.hour)
+            else:
+                hour = int(current_time) // SECONDS_PER_HOUR % 24
         except Exception:
             hour = 0
-        if cache_key in self.path_cache:
-            base_seconds = self.path_cache[cache_key]
-        else:
-            try:
-                travel_time_minutes = nx.shortest_path_length(self.network_graph, from_node, to_node, weight='weight')
-                base_seconds = travel_time_minutes * 60
-                self.path_cache[cache_key] = base_seconds
-            except Exception:
-                base_seconds = 30 * 60
-                self.path_cache[cache_key] = base_seconds
         factor = self.hourly_speed_factors.get(hour, self.base_speed_factor_assumed)
         if factor <= 0:
             factor = self.base_speed_factor_assumed
-        scaled_seconds = base_seconds * (self.base_speed_factor_assumed / factor)
+        return self.base_speed_factor_assumed / factor
+
+    def get_shortest_path_time(self, from_node, to_node, current_time=None):
+        cache_key = (from_node, to_node)
+        i = self.matrix_index.get(from_node)
+        j = self.matrix_index.get(to_node) if i is not None else None
+        if j is not None:
+            base_seconds = float(self.travel_matrix[i, j])
+            self.path_cache.matrix_hits += 1
+        else:
+            base_seconds = self.path_cache.get(cache_key)
+            if base_seconds is None:
+                base_seconds = self.path_store.get(from_node, to_node) if self.path_store is not None else None
+                if base_seconds is not None:
+                    self.path_cache.store_hits += 1
+                else:
+                    compute_start = time.perf_counter()
+                    base_seconds = self._compute_base_seconds(from_node, to_node)
+                    self.path_cache.record_dijkstra(1, time.perf_counter() - compute_start)
+                    if self.path_store is not None:
+                        self.path_store.put(from_node, to_node, base_seconds)
+                self.path_cache.put(cache_key, base_seconds)
+        scaled_seconds = base_seconds * self._speed_scale(current_time)
         return scaled_seconds
 
+    def _pickup_lower_bounds(self, from_nodes, to_node, current_time=None):
+        # 출발 노드별 소요초 하한 (get_shortest_path_time과 같은 속도계수, 30분 대체값 이하). 가지치기 미사용이면 0
+        if self.geo_bound is None:
+            return [0.0] * len(from_nodes)
+        try:
+            minutes = self.geo_bound.minutes_to(from_nodes, to_node, cap_minutes=30)
+        except Exception:
+            return [0.0] * len(from_nodes)
+        scale = self._speed_scale(current_time)
+        return [m * 60 * scale for m in minutes.tolist()]
+
+    def _compute_base_seconds(self, from_node, to_node):
+        # 캐시 미스 구간의 기본 소요초 (경로 없음/노드 없음은 30분)
+        if self.csr_router is not None:
+            try:
+                travel_time_minutes = self.csr_router.path_length(from_node, to_node)
+            except Exception:
+                travel_time_minutes = None
+            return travel_time_minutes * 60 if travel_time_minutes is not None else 30 * 60
+        if self.alt_index is not None:
+            try:
+                travel_time_minutes = self.alt_index.path_length(self.network_graph, from_node, to_node)
+                return travel_time_minutes * 60 if travel_time_minutes is not None else 30 * 60
+            except Exception:
+                pass
+        try:
+            travel_time_minutes = nx.shortest_path_length(self.network_graph, from_node, to_node, weight='weight')
+            return travel_time_minutes * 60
+        except Exception:
+            return 30 * 60
+
+    def _prefetch_travel_times(self, from_nodes, to_node):
+        # 캐시에 없는 (출발 → to_node) 구간이 둘 이상이면 역방향 Dijkstra 한 번으로 채움
+        missing = []
+        to_in_matrix = to_node in self.matrix_index
+        for node in dict.fromkeys(from_nodes):
+            cache_key = (node, to_node)
+            if (to_in_matrix and node in self.matrix_index) or cache_key in self.path_cache:
+                continue
+            self.path_cache.prefetch_lookups += 1
+            if self.path_store is not None:
+                stored = self.path_store.get(node, to_node)
+                if stored is not None:
+                    self.path_cache.prefetch_store_hits += 1
+                    self.path_cache.put(cache_key, stored)
+                    continue
+            missing.append(node)
+        if len(missing) < 2:
+            return
+        compute_start = time.perf_counter()
+        try:
+            if self.csr_router is not None:
+                lengths = self.csr_router.lengths_to(to_node, missing)
+            else:
+                lengths = reverse_dijkstra_lengths(self.network_graph, to_node, missing)
+        except Exception:
+            return
+        finally:
+            self.path_cache.record_dijkstra(1, time.perf_counter() - compute_start)
+        self.path_cache.prefetch_fills += len(missing)
+        for node in missing:
+            minutes = lengths.get(node)
+            base_seconds = minutes * 60 if minutes is not None else 30 * 60
+            self.path_cache.put((node, to_node), base_seconds)
+            if self.path_store is not None:
+                self.path_store.put(node, to_node, base_seconds)
+
+    def _collect_day_nodes(self):
+        # 당일 경로 조회가 닿을 수 있는 노드: 차고지, 차량 현재 위치, 승객(가상 승객 포함) 승하차 노드
+        nodes = {}
+        for info in self.depot_info.values():
+            nodes.setdefault(info.get('node_id'), None)
+        for v in self.vehicles.values():
+            for loc in (v.depot_location, v.current_location):
+                if loc is not None:
+                    nodes.setdefault(loc.node_id, None)
+            p = v.assigned_passenger
+            if p is not None:
+                nodes.setdefault(p.pickup_location.node_id, None)
+                nodes.setdefault(p.dropoff_location.node_id, None)
+        for p in self.passengers.values():
+            nodes.setdefault(p.pickup_location.node_id, None)
+            nodes.setdefault(p.dropoff_location.node_id, None)
+        nodes.pop(None, None)
+        return list(nodes)
+
+    def build_travel_matrix(self):
+        # 당일 노드 전체에 대해 출발 노드별 Dijkstra 한 번으로 기본 소요초 행렬 구성 (경로 없음/노드 없음은 30분)
+        print('당일 이동시간 행렬 구성 중...')
+        build_start = time.time()
+        nodes = self._collect_day_nodes()
+        index = {node: k for k, node in enumerate(nodes)}
+        if self.csr_router is not None:
+            minutes = self.csr_router.lengths_matrix(nodes)
+            matrix = np.where(np.isfinite(minutes), minutes * 60, 30 * 60)
+        else:
+            matrix = np.full((len(nodes), len(nodes)), 30 * 60, dtype=float)
+            for k, source in enumerate(nodes):
+                try:
+                    lengths = nx.single_source_dijkstra_path_length(self.network_graph, source, weight='weight')
+                except Exception:
+                    continue
+                for node, minutes in lengths.items():
+                    col = index.get(node)
+                    if col is not None:
+                        matrix[k, col] = minutes * 60
+        self.matrix_index = index
+        self.travel_matrix = matrix
+        print(f'   노드: {len(nodes):,}개, 소요: {time.time() - build_start:.1f}초')
+        return True
+
+    # --- 차량 상태 인덱스 / 완료 타이머 힙 ---
+    def _rebuild_vehicle_indexes(self):
+        self.vehicle_status_index = {status: set() for status in VehicleStatus}
+        self.vehicle_order = {vid: i for i, vid in enumerate(self.vehicles)}
+        self.completion_heap = []
+        self._completion_seq = 0
+        self._duty_hour = None
+        for vid, v in self.vehicles.items():
+            self.vehicle_status_index[v.status].add(vid)
+            if v.service_end_time is not None:
+                self._push_completion(v)
+        self._build_fleet_arrays()
+
+    def _build_fleet_arrays(self):
+        # 근무표/퇴근시각/서비스 권역을 차량 × 시간대 배열로 고정 (운행 중에는 근무표가 바뀌지 않음)
+        self.fleet_vehicles = list(self.vehicles.values())
+        n = len(self.fleet_vehicles)
+        schedule = np.zeros((n, 24), dtype=bool)
+        work_end_hour = np.full(n, -1, dtype=int)
+        for i, v in enumerate(self.fleet_vehicles):
+            for h in range(24):
+                schedule[i, h] = bool(v.accurate_schedule.get(h, False))
+            try:
+                work_end_hour[i] = int(v.work_end.split(':')[0])
+            except Exception:
+                pass
+        self.fleet_schedule = schedule
+        self.fleet_next_active = np.roll(schedule, -1, axis=1)
+        self.fleet_work_end_hour = work_end_hour
+        self.fleet_inside_only = np.array([v.service_area == "INSIDE_ONLY" for v in self.fleet_vehicles], dtype=bool)
+        self.fleet_idle = np.array([v.status == VehicleStatus.IDLE for v in self.fleet_vehicles], dtype=bool)
+        # 퇴근 1시간 전 구간은 신규 배정 제외
+        self._fleet_last_hour = (work_end_hour[None, :] - 1) == np.arange(24)[:, None]
+        self._fleet_hour_ok = schedule.T & ~self._fleet_last_hour
+        self._build_lunch_index()
+
+    def _build_lunch_index(self):
+        # 점심 재배치/정규화가 끝난 lunch_seconds를 (경계 초, 차량 순서, 차량 ID, ±1) 정렬 목록으로 고정
+        # 정수 초 t에서 start <= t < end 는 ceil(start) <= t < ceil(end) 와 같음
+        edges = []
+        for vid, v in self.vehicles.items():
+            order = self.vehicle_order[vid]
+            for start_s, end_s in v.lunch_seconds:
+                start_edge, end_edge = math.ceil(start_s), math.ceil(end_s)
+                if start_edge < end_edge:
+                    edges.append((start_edge, order, vid, 1))
+                    edges.append((end_edge, order, vid, -1))
+        self._lunch_edge_events = sorted(edges)
+        self._lunch_edge_cursor = 0
+        self._lunch_clock = None
+        self.fleet_lunch_depth = np.zeros(len(self.fleet_vehicles), dtype=int)
+
+    def _eligible_idle_indices(self, current_hour, current_time, exclude_inside_only=False, require_next_hour=False):
+        # 배정 가능 IDLE 차량의 self.vehicles 순서 인덱스: 근무/퇴근 전 1시간/권역은 마스크, 점심창은 후보만 확인
+        mask = self.fleet_idle & self._fleet_hour_ok[current_hour]
+        if current_time == self._lunch_clock:
+            mask &= self.fleet_lunch_depth == 0
+        if exclude_inside_only:
+            mask &= ~self.fleet_inside_only
+        if require_next_hour:
+            mask &= self.fleet_next_active[:, current_hour]
+        eligible = []
+        for i in np.flatnonzero(mask):
+            v = self.fleet_vehicles[i]
+            if v.assigned_passenger is None and not self._is_in_lunch_break(v, current_time):
+                eligible.append(i)
+        return eligible
+
+    def _set_vehicle_status(self, vehicle, status):
+        if vehicle.status != status:
+            self.vehicle_status_index[vehicle.status].discard(vehicle.vehicle_id)
+            self.vehicle_status_index[status].add(vehicle.vehicle_id)
+            self.fleet_idle[self.vehicle_order[vehicle.vehicle_id]] = status == VehicleStatus.IDLE
+            vehicle.status = status
+            self._state_version += 1
+            self._refresh_vehicle_progress(vehicle)
+
+    def _set_passenger_status(self, passenger, status):
+        # 등록 승객(self.passengers)만 상태별로 집계 (전날 연속운행 가상 승객 제외)
+        if self.passengers.get(passenger.demand_id) is passenger:
+            self.passenger_status_counts[passenger.status] -= 1
+            self.passenger_status_counts[status] += 1
+        passenger.status = status
+
+    def _push_completion(self, vehicle):
+        self._completion_seq += 1
+        heapq.heappush(self.completion_heap, (vehicle.service_end_time, self._completion_seq, vehicle.vehicle_id))
+
+    def _set_service_end_time(self, vehicle, end_time):
+        vehicle.service_end_time = end_time
+        self._state_version += 1
+        if end_time is not None:
+            self._push_completion(vehicle)
+
+    def _vehicles_with_status(self, status):
+        # 상태별 인덱스의 차량을 self.vehicles 순서로 반환 (동률 시 선택 순서 보존)
+        ids = sorted(self.vehicle_status_index[status], key=self.vehicle_order.__getitem__)
+        return [self.vehicles[vid] for vid in ids]
+
+    def _peek_completion_time(self):
+        # 유효한(현재 service_end_time과 일치하는) 가장 이른 완료 시각
+        heap = self.completion_heap
+        while heap:
+            end_time, _, vid = heap[0]
+            if self.vehicles[vid].service_end_time == end_time:
+                return end_time
+            heapq.heappop(heap)
+        return None
+
+    def _pop_due_vehicles(self, current_time):
+        # service_end_time <= current_time 인 차량을 self.vehicles 순서로 반환
+        heap = self.completion_heap
+        due_ids = set()
+        while heap and heap[0][0] <= current_time:
+            end_time, _, vid = heapq.heappop(heap)
+            if self.vehicles[vid].service_end_time == end_time:
+                due_ids.add(vid)
+        return [self.vehicles[vid] for vid in sorted(due_ids, key=self.vehicle_order.__getitem__)]
+
     # --- 상태 업데이트 및 배정 로직 ---
     def update_vehicle_status(self, current_time):
-        current_hour = current_time.hour
-        for vehicle in self.vehicles.values():
-            is_work_time = vehicle.accurate_schedule.get(current_hour, False)
-            # 새벽 시간 특례는 accurate_schedule을 그대로 신뢰
-            if not is_work_time:
-                if vehicle.status not in [VehicleStatus.OFF_DUTY]:
-                    if vehicle.status in [VehicleStatus.TRAVELING_TO_PICKUP, VehicleStatus.PICKING_UP, VehicleStatus.TRAVELING_TO_DROPOFF, VehicleStatus.DROPPING_OFF]:
-                        continue
-                    else:
-                        vehicle.status = VehicleStatus.OFF_DUTY
-                        vehicle.current_location = vehicle.depot_location
-            else:
-                if vehicle.status == VehicleStatus.OFF_DUTY:
-                    vehicle.status = VehicleStatus.IDLE
+        current_hour = current_time // SECONDS_PER_HOUR
+        # 근무 전이는 시간대가 바뀔 때만 전체 점검. 같은 시간대 안의 다른 전이는 근무 여부와 항상 정합
+        if current_hour != self._duty_hour:
+            self._duty_hour = current_hour
+            for vehicle in self.vehicles.values():
+                is_work_time = vehicle.accurate_schedule.get(current_hour, False)
+                # 새벽 시간 특례는 accurate_schedule을 그대로 신뢰
+                if not is_work_time:
+                    if vehicle.status not in [VehicleStatus.OFF_DUTY]:
+                        if vehicle.status in [VehicleStatus.TRAVELING_TO_PICKUP, VehicleStatus.PICKING_UP, VehicleStatus.TRAVELING_TO_DROPOFF, VehicleStatus.DROPPING_OFF]:
+                            continue
+                        else:
+                            self._set_vehicle_status(vehicle, VehicleStatus.OFF_DUTY)
+                            vehicle.current_location = vehicle.depot_location
+                else:
+                    if vehicle.status == VehicleStatus.OFF_DUTY:
+                        self._set_vehicle_status(vehicle, VehicleStatus.IDLE)
+            # 시간대가 바뀌면 스냅샷 카운터도 전체 재계산
+            for vehicle in self.vehicles.values():
+                self._refresh_vehicle_progress(vehicle)
 
         # ASSIGNED → TRAVELING_TO_PICKUP 초기 전이 처리
-        for vehicle in self.vehicles.values():
+        for vehicle in self._vehicles_with_status(VehicleStatus.ASSIGNED):
             if vehicle.assigned_passenger is None:
                 continue
-            if vehicle.status == VehicleStatus.ASSIGNED:
-                passenger = vehicle.assigned_passenger
-                try:
-                    pickup_travel_time = self.get_shortest_path_time(
-                        vehicle.current_location.node_id,
-                        passenger.pickup_location.node_id,
-                        current_time=current_time
-                    )
-                except Exception:
-                    pickup_travel_time = 5 * 60
-                vehicle.service_end_time = current_time + timedelta(seconds=pickup_travel_time)
-                vehicle.status = VehicleStatus.TRAVELING_TO_PICKUP
+            passenger = vehicle.assigned_passenger
+            try:
+                pickup_travel_time = self.get_shortest_path_time(
+                    vehicle.current_location.node_id,
+                    passenger.pickup_location.node_id,
+                    current_time=current_time
+                )
+            except Exception:
+                pickup_travel_time = 5 * 60
+            self._set_service_end_time(vehicle, advance_clock(current_time, pickup_travel_time))
+            self._set_vehicle_status(vehicle, VehicleStatus.TRAVELING_TO_PICKUP)
 
-        for vehicle in self.vehicles.values():
-            if vehicle.service_end_time and current_time >= vehicle.service_end_time:
+        # service_end_time 만료 차량만 힙에서 꺼내 처리
+        for vehicle in self._pop_due_vehicles(current_time):
+            if vehicle.service_end_time is not None and current_time >= vehicle.service_end_time:
                 if vehicle.status == VehicleStatus.DROPPING_OFF:
                     passenger = vehicle.assigned_passenger
                     if passenger:
                         passenger.dropoff_time = current_time
-                        passenger.status = PassengerStatus.DROPPED_OFF
+                        self._set_passenger_status(passenger, PassengerStatus.DROPPED_OFF)
                         try:
-                            passenger.service_travel_time = (passenger.dropoff_time - passenger.pickup_time).total_seconds() / 60
+                            passenger.service_travel_time = (passenger.dropoff_time - passenger.pickup_time) / 60
                         except Exception:
                             passenger.service_travel_time = 0
                         try:
-                            passenger.total_trip_time = (passenger.dropoff_time - passenger.request_time).total_seconds() / 60
+                            passenger.total_trip_time = (passenger.dropoff_time - passenger.request_second) / 60
                         except Exception:
                             passenger.total_trip_time = 0
                         self.update_demand_log(passenger.demand_id, dropoff_time=current_time)
@@ -893,10 +2846,10 @@ class ScheduledIncreaseWithShiftSimulation:
                             'vehicle_id': vehicle.vehicle_id,
                             'vehicle_no': vehicle.vehicle_no,
                             'depot': vehicle.depot_name,
-                            'request_time': passenger.request_time.strftime('%H:%M:%S') if passenger.request_time else '',
-                            'assigned_time': passenger.assigned_time.strftime('%H:%M:%S') if passenger.assigned_time else '',
-                            'pickup_time': passenger.pickup_time.strftime('%H:%M:%S') if passenger.pickup_time else '',
-                            'dropoff_time': passenger.dropoff_time.strftime('%H:%M:%S') if passenger.dropoff_time else '',
+                            'request_time': format_clock(passenger.request_second) if passenger.request_second is not None else '',
+                            'assigned_time': format_clock(passenger.assigned_time) if passenger.assigned_time is not None else '',
+                            'pickup_time': format_clock(passenger.pickup_time) if passenger.pickup_time is not None else '',
+                            'dropoff_time': format_clock(passenger.dropoff_time) if passenger.dropoff_time is not None else '',
                             'call_waiting_time': passenger.call_waiting_time,
                             'pickup_waiting_time': passenger.pickup_waiting_time,
                             'service_travel_time': passenger.service_travel_time,
@@ -907,30 +2860,29 @@ class ScheduledIncreaseWithShiftSimulation:
                         })
                     vehicle.assigned_passenger = None
                     vehicle.service_start_time = None
-                    vehicle.service_end_time = None
+                    self._set_service_end_time(vehicle, None)
                     vehicle.daily_services += 1
-                    current_hour = current_time.hour
                     is_work_time = vehicle.accurate_schedule.get(current_hour, False)
                     if is_work_time:
-                        vehicle.status = VehicleStatus.IDLE
+                        self._set_vehicle_status(vehicle, VehicleStatus.IDLE)
                         vehicle.current_location = vehicle.depot_location
                         self.log_vehicle_service(vehicle.vehicle_id, 'RETURN_IDLE', None, current_time)
                     else:
-                        vehicle.status = VehicleStatus.OFF_DUTY
+                        self._set_vehicle_status(vehicle, VehicleStatus.OFF_DUTY)
                 elif vehicle.status == VehicleStatus.TRAVELING_TO_PICKUP:
                     passenger = vehicle.assigned_passenger
                     if passenger:
-                        passenger.status = PassengerStatus.PICKED_UP
+                        self._set_passenger_status(passenger, PassengerStatus.PICKED_UP)
                         passenger.pickup_time = current_time
                         try:
-                            passenger.pickup_waiting_time = (passenger.pickup_time - passenger.assigned_time).total_seconds() / 60
+                            passenger.pickup_waiting_time = (passenger.pickup_time - passenger.assigned_time) / 60
                         except Exception:
                             passenger.pickup_waiting_time = 0
                         self.update_demand_log(passenger.demand_id, pickup_time=current_time)
                         self.log_vehicle_service(vehicle.vehicle_id, 'PICKUP', passenger.demand_id, current_time)
                         boarding_seconds = 3 * 60
-                        vehicle.service_end_time = current_time + timedelta(seconds=boarding_seconds)
-                        vehicle.status = VehicleStatus.PICKING_UP
+                        self._set_service_end_time(vehicle, current_time + boarding_seconds)
+                        self._set_vehicle_status(vehicle, VehicleStatus.PICKING_UP)
 
                 elif vehicle.status == VehicleStatus.PICKING_UP:
                     passenger = vehicle.assigned_passenger
@@ -940,50 +2892,53 @@ class ScheduledIncreaseWithShiftSimulation:
                             passenger.dropoff_location.node_id,
                             current_time=current_time
                         )
-                        vehicle.service_end_time = current_time + timedelta(seconds=service_travel_seconds)
-                        vehicle.status = VehicleStatus.TRAVELING_TO_DROPOFF
+                        self._set_service_end_time(vehicle, advance_clock(current_time, service_travel_seconds))
+                        self._set_vehicle_status(vehicle, VehicleStatus.TRAVELING_TO_DROPOFF)
                         vehicle.current_location = passenger.dropoff_location
                 elif vehicle.status == VehicleStatus.TRAVELING_TO_DROPOFF:
-                    vehicle.status = VehicleStatus.DROPPING_OFF
-                    vehicle.service_end_time = current_time + timedelta(seconds=2 * 60)
+                    self._set_vehicle_status(vehicle, VehicleStatus.DROPPING_OFF)
+                    self._set_service_end_time(vehicle, current_time + 2 * 60)
 
     def assign_passenger_to_vehicle(self, passenger, current_time):
         if passenger.demand_id in self.assigned_demands:
             return False
-        current_hour = current_time.hour
+        current_hour = current_time // SECONDS_PER_HOUR
+        pickup_node = passenger.pickup_location.node_id
         available_vehicles = []
-        for v in self.vehicles.values():
-            if v.status == VehicleStatus.IDLE and v.assigned_passenger is None:
-                is_working = v.accurate_schedule.get(current_hour, False)
-                # 점심시간 조정 창에서는 배정 제외 (단, 이미 ASSIGNED/운행 중이면 제외하지 않음)
-                if is_working and self._is_in_lunch_break(v, current_time):
-                    if v.assigned_passenger is None and v.status == VehicleStatus.IDLE:
+        vehicle_bounds = {}
+        # 근무 중·퇴근 1시간 전 아님·점심창 아님·(관외 수요면) 겸용 차량만 후보
+        eligible = self._eligible_idle_indices(current_hour, current_time, exclude_inside_only=passenger.is_outside_area)
+        from_nodes = [self.fleet_vehicles[i].current_location.node_id for i in eligible]
+        # 후보별 픽업 소요초 하한: 정확 ETA는 하한으로 걸러지지 않는 차량만 계산
+        bounds = self._pickup_lower_bounds(from_nodes, pickup_node, current_time)
+        if self.geo_bound is None:
+            # 후보 차량 위치 → 픽업 ETA는 픽업 노드 기준 역방향 탐색 한 번으로 미리 채움
+            self._prefetch_travel_times(from_nodes, pickup_node)
+        next_hour_start = (current_hour + 1) * SECONDS_PER_HOUR
+        service_travel_time = None
+        for k, i in enumerate(eligible):
+            v = self.fleet_vehicles[i]
+            is_working = True
+            if not self.fleet_next_active[i, current_hour]:
+                # 다음 시간 근무가 없으면 현재 시간 안에 서비스를 마칠 수 있는 경우만 허용
+                try:
+                    if service_travel_time is None:
+                        service_travel_time = self.get_shortest_path_time(pickup_node, passenger.dropoff_location.node_id, current_time=current_time) / 60
+                    if advance_clock(current_time, (bounds[k] / 60 + 3 + service_travel_time + 3) * 60) >= next_hour_start:
+                        # 픽업 하한으로도 시간 안에 못 마침
+                        self.path_cache.bound_skips += 1
                         is_working = False
-                if passenger.is_outside_area and v.service_area == "INSIDE_ONLY":
-                    continue
-                if is_working and hasattr(v, 'work_end'):
-                    try:
-                        work_end_hour = int(v.work_end.split(':')[0])
-                        if current_hour >= work_end_hour - 1 and current_hour < work_end_hour:
-                            is_working = False
-                    except Exception:
-                        pass
-                if is_working:
-                    next_hour = (current_hour + 1) % 24
-                    next_hour_active = v.accurate_schedule.get(next_hour, False) if hasattr(v, "accurate_schedule") else False
-                    if not next_hour_active:
-                        try:
-                            pickup_travel_time = self.get_shortest_path_time(v.current_location.node_id, passenger.pickup_location.node_id, current_time=current_time) / 60
-                            service_travel_time = self.get_shortest_path_time(passenger.pickup_location.node_id, passenger.dropoff_location.node_id, current_time=current_time) / 60
-                            total_service_minutes = pickup_travel_time + 3 + service_travel_time + 3
-                            service_completion_time = current_time + timedelta(minutes=total_service_minutes)
-                            next_hour_start = current_time.replace(minute=0, second=0) + timedelta(hours=1)
-                            if service_completion_time >= next_hour_start:
-                                is_working = False
-                        except Exception:
+                    else:
+                        pickup_travel_time = self.get_shortest_path_time(v.current_location.node_id, pickup_node, current_time=current_time) / 60
+                        total_service_minutes = pickup_travel_time + 3 + service_travel_time + 3
+                        service_completion_time = advance_clock(current_time, total_service_minutes * 60)
+                        if service_completion_time >= next_hour_start:
                             is_working = False
-                if is_working:
-                    available_vehicles.append(v)
+                except Exception:
+                    is_working = False
+            if is_working:
+                available_vehicles.append(v)
+                vehicle_bounds[v.vehicle_id] = bounds[k]
         if not available_vehicles:
             return False
         # 권역 우선 비율 적용: 픽업 권역 명이 있고 비율 조건이면 동일 권역 차량만 후보로 제한
@@ -999,71 +2954,65 @@ class ScheduledIncreaseWithShiftSimulation:
                         candidate_vehicles = same_region
         except Exception:
             candidate_vehicles = available_vehicles
-        best_vehicle = None
-        best_time = float('inf')
-        for vehicle in candidate_vehicles:
-            travel_seconds = self.get_shortest_path_time(vehicle.current_location.node_id, passenger.pickup_location.node_id, current_time=current_time)
-            if travel_seconds < best_time:
-                best_time = travel_seconds
-                best_vehicle = vehicle
+        best_vehicle, best_time = self._select_nearest_vehicle(candidate_vehicles, [vehicle_bounds[v.vehicle_id] for v in candidate_vehicles],
+                                                               pickup_node, current_time)
         if best_vehicle:
             self.assigned_demands.add(passenger.demand_id)
             passenger.assigned_vehicle = best_vehicle
             passenger.assigned_time = current_time
-            passenger.status = PassengerStatus.ASSIGNED
-            passenger.call_waiting_time = (passenger.assigned_time - passenger.request_time).total_seconds() / 60
+            self._set_passenger_status(passenger, PassengerStatus.ASSIGNED)
+            passenger.call_waiting_time = (passenger.assigned_time - passenger.request_second) / 60
             best_vehicle.assigned_passenger = passenger
-            best_vehicle.status = VehicleStatus.TRAVELING_TO_PICKUP
+            self._set_vehicle_status(best_vehicle, VehicleStatus.TRAVELING_TO_PICKUP)
             best_vehicle.service_start_time = current_time
-            best_vehicle.service_end_time = current_time + timedelta(seconds=best_time)
+            self._set_service_end_time(best_vehicle, advance_clock(current_time, best_time))
             self.log_demand_call_result(passenger, 'ASSIGNED', best_vehicle.vehicle_id, current_time)
             self.log_vehicle_service(best_vehicle.vehicle_id, 'ASSIGNED', passenger.demand_id, current_time)
             return True
         return False
 
+    def _select_nearest_vehicle(self, vehicles, bounds, pickup_node, current_time):
+        # 픽업 ETA 최소 차량 (동률이면 목록 앞쪽). 하한 오름차순으로 정확 ETA를 계산하다가
+        # 남은 하한이 모두 현재 최선 ETA보다 크면 중단하므로 전수 계산과 같은 차량을 고름
+        order = sorted(range(len(vehicles)), key=bounds.__getitem__)
+        best_k = None
+        best_time = float('inf')
+        prefetched = self.geo_bound is None
+        for n, k in enumerate(order):
+            if bounds[k] > best_time:
+                self.path_cache.bound_skips += len(order) - n
+                break
+            if not prefetched and best_k is not None:
+                # 첫 후보 ETA 이하의 하한을 가진 후보만 역방향 탐색 한 번으로 채움
+                self._prefetch_travel_times([vehicles[m].current_location.node_id for m in order[n:] if bounds[m] <= best_time], pickup_node)
+                prefetched = True
+            travel_seconds = self.get_shortest_path_time(vehicles[k].current_location.node_id, pickup_node, current_time=current_time)
+            if travel_seconds < best_time or (travel_seconds == best_time and best_k is not None and k < best_k):
+                best_time = travel_seconds
+                best_k = k
+        if best_k is None:
+            return None, float('inf')
+        return vehicles[best_k], best_time
+
     def process_pending_passengers(self, current_time):
-        if not self.pending_passengers:
+        if not self.pending_passengers.has_waiting():
             return
-        current_hour = current_time.hour
-        available_vehicles = []
-        for vehicle in self.vehicles.values():
-            if vehicle.status == VehicleStatus.IDLE and vehicle.assigned_passenger is None:
-                is_working = vehicle.accurate_schedule.get(current_hour, False)
-                # 점심시간 조정 창에서는 배정 제외 (단, 이미 ASSIGNED/운행 중이면 제외하지 않음)
-                if is_working and self._is_in_lunch_break(vehicle, current_time):
-                    if vehicle.assigned_passenger is None and vehicle.status == VehicleStatus.IDLE:
-                        is_working = False
-                if is_working and hasattr(vehicle, 'work_end'):
-                    try:
-                        work_end_hour = int(vehicle.work_end.split(':')[0])
-                        if current_hour >= work_end_hour - 1 and current_hour < work_end_hour:
-                            is_working = False
-                    except Exception:
-                        pass
-                if is_working:
-                    next_hour = (current_hour + 1) % 24
-                    next_hour_active = vehicle.accurate_schedule.get(next_hour, False) if hasattr(vehicle, "accurate_schedule") else False
-                    if not next_hour_active:
-                        try:
-                            # pending assignment conservative check: skip complex ETA calc if unsafe
-                            is_working = False
-                        except Exception:
-                            is_working = False
-                if is_working:
-                    available_vehicles.append(vehicle)
-
-        pending_passengers_list = [p for p in self.pending_passengers if p.demand_id not in self.assigned_demands]
-        outside_passengers = [p for p in pending_passengers_list if p.is_outside_area]
-        inside_passengers = [p for p in pending_passengers_list if not p.is_outside_area]
-        both_vehicles = [v for v in available_vehicles if v.service_area == "BOTH"]
-        inside_only_vehicles = [v for v in available_vehicles if v.service_area == "INSIDE_ONLY"]
-        outside_assignments = min(len(outside_passengers), len(both_vehicles))
+        current_hour = current_time // SECONDS_PER_HOUR
+        # 대기열 배정은 보수적으로 다음 시간에도 근무하는 차량만 사용 (ETA 계산 생략)
+        available = self._eligible_idle_indices(current_hour, current_time, require_next_hour=True)
+
+        outside_waiting, inside_waiting = self.pending_passengers.waiting_counts()
+        both_vehicles = [self.fleet_vehicles[i] for i in available if self.fleet_vehicles[i].service_area == "BOTH"]
+        inside_only_vehicles = [self.fleet_vehicles[i] for i in available if self.fleet_inside_only[i]]
+        outside_assignments = min(outside_waiting, len(both_vehicles))
         remaining_both = len(both_vehicles) - outside_assignments
-        inside_assignments = min(len(inside_passengers), remaining_both + len(inside_only_vehicles))
+        inside_assignments = min(inside_waiting, remaining_both + len(inside_only_vehicles))
         total_assignments = outside_assignments + inside_assignments
         if total_assignments > 0:
-            print(f"{current_time.strftime('%H:%M')} 즉시배정: 관외{len(outside_passengers)}명+관내{len(inside_passengers)}명, "
+            print(f"{format_clock(current_time)[:5]} 즉시배정: 관외{outside_waiting}명+관내{inside_waiting}명, "
                   f"겸용{len(both_vehicles)}대+전용{len(inside_only_vehicles)}대 → 관외{outside_assignments}+관내{inside_assignments}건 배정")
+        outside_passengers = self.pending_passengers.head(True, outside_assignments)
+        inside_passengers = self.pending_passengers.head(False, inside_assignments)
         passengers_to_remove = []
         assignments = []
         for i in range(outside_assignments):
@@ -1072,19 +3021,18 @@ class ScheduledIncreaseWithShiftSimulation:
         for i in range(inside_assignments):
             assignments.append((inside_passengers[i], remaining_vehicles[i]))
         for passenger, vehicle in assignments:
-            vehicle.status = VehicleStatus.ASSIGNED
             vehicle.assigned_passenger = passenger
-            passenger.status = PassengerStatus.ASSIGNED
+            self._set_vehicle_status(vehicle, VehicleStatus.ASSIGNED)
+            self._set_passenger_status(passenger, PassengerStatus.ASSIGNED)
             passenger.assigned_vehicle = vehicle
             passenger.assigned_time = current_time
             try:
-                passenger.call_waiting_time = (passenger.assigned_time - passenger.request_time).total_seconds() / 60
+                passenger.call_waiting_time = (passenger.assigned_time - passenger.request_second) / 60
             except Exception:
                 passenger.call_waiting_time = 0
             pickup_time = 5 * 60
-            vehicle.service_end_time = current_time + timedelta(seconds=pickup_time)
             service_time = 25 * 60
-            vehicle.service_end_time = current_time + timedelta(seconds=pickup_time + service_time)
+            self._set_service_end_time(vehicle, current_time + pickup_time + service_time)
             self.assigned_demands.add(passenger.demand_id)
             self.log_demand_call_result(passenger, 'ASSIGNED', vehicle.vehicle_id, current_time)
             self.log_vehicle_service(vehicle.vehicle_id, 'ASSIGNED', passenger.demand_id, current_time)
@@ -1093,11 +3041,16 @@ class ScheduledIncreaseWithShiftSimulation:
             self.pending_passengers.remove(passenger)
 
     def process_second(self, current_time):
+        self.current_second = current_time
+        self._advance_lunch_edges(current_time)
         self.update_vehicle_status(current_time)
         self.process_pending_passengers(current_time)
-        for passenger in self.passengers.values():
-            if (passenger.status == PassengerStatus.REQUESTED and passenger.request_time <= current_time and passenger.demand_id not in self.assigned_demands):
+        # 대기열 승객 재시도 후 신규 도착 승객 처리: 대기열은 항상 먼저 도착한 승객이므로 도착 순서가 유지됨
+        retry_passengers = self.pending_passengers.waiting()
+        for passenger in retry_passengers + self._pop_arrived_passengers(current_time):
+            if (passenger.status == PassengerStatus.REQUESTED and passenger.request_second <= current_time and passenger.demand_id not in self.assigned_demands):
                 if self.assign_passenger_to_vehicle(passenger, current_time):
+                    self.pending_passengers.retire(passenger)
                     continue
                 else:
                     if passenger not in self.pending_passengers:
@@ -1105,9 +3058,179 @@ class ScheduledIncreaseWithShiftSimulation:
                         self.log_demand_call_result(passenger, 'WAITING', None, current_time)
         self.process_pending_passengers(current_time)
 
-    def run_simulation(self, date_str='2025-06-23'):
+
+    # --- 진행 스냅샷 증분 카운터 ---
+    def _progress_flags(self, v, current_hour, current_time):
+        # 차량 한 대의 스냅샷 기여도 (PROGRESS_COUNTER_KEYS 순서)
+        i = self.vehicle_order[v.vehicle_id]
+        scheduled = bool(self.fleet_schedule[i, current_hour])
+        in_lunch = self._is_in_lunch_break(v, current_time)
+        idle_free = v.assigned_passenger is None and v.status == VehicleStatus.IDLE
+        # 점심시간 조정 창 동안(미배정·IDLE) 활성/가용에서 제외. 운행 중이면 포함
+        lunch_blocked = scheduled and in_lunch and idle_free
+        is_active = scheduled and not lunch_blocked
+        available = False
+        busy = False
+        if is_active:
+            if v.status == VehicleStatus.IDLE:
+                available = not self._fleet_last_hour[current_hour, i]
+            elif v.status != VehicleStatus.OFF_DUTY:
+                busy = True
+        lunch_in_service = in_lunch and not idle_free
+        added_active = scheduled and v.vehicle_id in self.added_vehicle_ids
+        return (int(is_active), int(available), int(busy), int(in_lunch), int(lunch_blocked), int(lunch_in_service), int(added_active))
+
+    def _refresh_vehicle_progress(self, vehicle):
+        current_time = self.current_second
+        new_flags = self._progress_flags(vehicle, current_time // SECONDS_PER_HOUR, current_time)
+        old_flags = self._vehicle_progress_flags.get(vehicle.vehicle_id)
+        if old_flags == new_flags:
+            return
+        counters = self.progress_counters
+        for i, key in enumerate(PROGRESS_COUNTER_KEYS):
+            counters[key] += new_flags[i] - (old_flags[i] if old_flags else 0)
+        self._vehicle_progress_flags[vehicle.vehicle_id] = new_flags
+
+    def _reset_progress_counters(self):
+        self.progress_counters = dict.fromkeys(PROGRESS_COUNTER_KEYS, 0)
+        self._vehicle_progress_flags = {}
+        self.passenger_status_counts = defaultdict(int)
+        for p in self.passengers.values():
+            self.passenger_status_counts[p.status] += 1
+
+    def _advance_lunch_edges(self, current_time):
+        # 점심창 인덱스를 current_time까지 진행한 뒤, 경계를 지난 차량의 스냅샷 기여도 갱신
+        events = self._lunch_edge_events
+        crossed = []
+        while self._lunch_edge_cursor < len(events) and events[self._lunch_edge_cursor][0] <= current_time:
+            _, order, vid, delta = events[self._lunch_edge_cursor]
+            self.fleet_lunch_depth[order] += delta
+            crossed.append(vid)
+            self._lunch_edge_cursor += 1
+        self._lunch_clock = current_time
+        for vid in crossed:
+            self._refresh_vehicle_progress(self.vehicles[vid])
+
+    def _record_progress(self, current_time):
+        counters = self.progress_counters
+        active_vehicles = counters['active']
+        available_vehicles = counters['available']
+        busy_vehicles = counters['busy']
+        lunch_total = counters['lunch_total']
+        lunch_blocked_idle = counters['lunch_blocked_idle']
+        lunch_in_service = counters['lunch_in_service']
+        added_total = len(self.added_vehicle_ids)
+        added_active = counters['added_active']
+        unassigned_waiting = len(self.pending_passengers)
+        assigned_waiting = self.passenger_status_counts[PassengerStatus.ASSIGNED]
+        total_waiting = unassigned_waiting + assigned_waiting
+        completed_services = len(self.service_records)
+        assigned_count = len(self.assigned_demands)
+        progress_percent = (self.processed_seconds / self.total_seconds) * 100
+        elapsed_real_time = time.time() - self.simulation_start_time
+        base_msg = (f"{format_clock(current_time)[:5]} ({progress_percent:.1f}%) - "
+                    f"가동:{active_vehicles}대, 운행가능:{available_vehicles}대, 서비스중:{busy_vehicles}대, "
+                    f"대기:{total_waiting}명(미배정:{unassigned_waiting}, 차량대기:{assigned_waiting}), "
+                    f"배정:{assigned_count}건, 완료:{completed_services}건 [실제경과: {elapsed_real_time:.1f}초]")
+        # 점심 영향 카운트(항상 표시): 점심(IDLE·미배정) 제외 수, 점심 중 운행 중 수
+        base_msg += f" | 점심(총/IDLE제외/운행중): {lunch_total}/{lunch_blocked_idle}/{lunch_in_service}"
+        # 추가 차량 현황 표시: 현재 활성 시간대에 속하는 추가 차량 수
+        base_msg += f" | 추가차량(총/가동): {added_total}/{added_active}"
+        if getattr(self, 'debug_lunch', False):
+            # 샘플 일부만 출력 (디버그 시에만 차량 목록 구성)
+            sample_n = max(0, int(getattr(self, 'debug_lunch_sample', 5)))
+            lunch_blocked_ids = [vid for vid, flags in self._vehicle_progress_flags.items() if flags[4]]
+            lunch_blocked_ids.sort(key=self.vehicle_order.__getitem__)
+            lunch_sample = lunch_blocked_ids[:sample_n]
+            base_msg += (f" [활성제외샘플:{lunch_sample} 가용제외샘플:{lunch_sample}]")
+        print(base_msg)
+        # 진행 로그를 CSV용 메모리에 적재
+        try:
+            self.progress_log.append({
+                'time': format_clock(current_time),
+                'active': active_vehicles,
+                'available': available_vehicles,
+                'busy': busy_vehicles,
+                'waiting_total': total_waiting,
+                'waiting_unassigned': unassigned_waiting,
+                'waiting_assigned': assigned_waiting,
+                'assigned_count': assigned_count,
+                'completed': completed_services,
+                'lunch_total': lunch_total,
+                'lunch_blocked_idle': lunch_blocked_idle,
+                'lunch_in_service': lunch_in_service,
+                'added_total': added_total,
+                'added_active': added_active
+            })
+        except Exception:
+            pass
+
+    # --- 시뮬레이션 시계 ---
+    def _init_sim_clock(self, start_time):
+        # 로드된 datetime 값을 자정 기준 초로 변환 (요청 시각, 점심 창)
+        for p in self.passengers.values():
+            p.request_second = (p.request_time - start_time).total_seconds()
+        for v in self.vehicles.values():
+            v.lunch_seconds = [((sdt - start_time).total_seconds(), (edt - start_time).total_seconds())
+                               for sdt, edt in getattr(v, 'lunch_windows', None) or []]
+
+    # --- 이벤트 기반 엔진 ---
+    def _collect_fixed_event_seconds(self, progress_interval):
+        # 시각이 고정된 이벤트: 시작, 정시 경계, 진행 스냅샷, 요청 도착, 점심창 시작/종료
+        # 소수 초 시각은 초단위 tick에서 처음 처리되는 초(올림)로 변환
+        seconds = {0}
+        seconds.update(range(0, self.total_seconds, SECONDS_PER_HOUR))
+        seconds.update(range(progress_interval, self.total_seconds, progress_interval))
+        for p in self.passengers.values():
+            seconds.add(max(0, math.ceil(p.request_second)))
+        for v in self.vehicles.values():
+            for start_s, end_s in v.lunch_seconds:
+                seconds.add(math.ceil(start_s))
+                seconds.add(math.ceil(end_s))
+        return sorted(s for s in seconds if 0 <= s < self.total_seconds)
+
+    def _state_fingerprint(self):
+        return (len(self.demand_call_log), len(self.service_records), len(self.pending_passengers), len(self.assigned_demands),
+                self._state_version)
+
+    def _next_dynamic_event_second(self, second):
+        # 차량 상태에 따라 다음으로 처리해야 하는 초 (없으면 None)
+        if self.vehicle_status_index[VehicleStatus.ASSIGNED]:
+            # ASSIGNED → TRAVELING_TO_PICKUP 전이는 다음 tick에서 처리
+            return second + 1
+        end_time = self._peek_completion_time()
+        if end_time is None:
+            return None
+        return max(second + 1, math.ceil(end_time))
+
+    def _run_event_loop(self, progress_interval):
+        # 상태가 바뀔 수 있는 초만 process_second로 처리. 그 외 초는 초단위 엔진에서도 상태 변화가 없음
+        fixed_seconds = self._collect_fixed_event_seconds(progress_interval)
+        fixed_idx = 0
+        second = 0
+        while second is not None and second < self.total_seconds:
+            before = self._state_fingerprint()
+            self.process_second(second)
+            self.processed_seconds = second + 1
+            if second > 0 and second % progress_interval == 0:
+                self._record_progress(second)
+            while fixed_idx < len(fixed_seconds) and fixed_seconds[fixed_idx] <= second:
+                fixed_idx += 1
+            candidates = []
+            if fixed_idx < len(fixed_seconds):
+                candidates.append(fixed_seconds[fixed_idx])
+            if self._state_fingerprint() != before:
+                # 이번 초에 상태가 변했다면 연쇄 전이를 위해 다음 초도 처리
+                candidates.append(second + 1)
+            dynamic = self._next_dynamic_event_second(second)
+            if dynamic is not None:
+                candidates.append(dynamic)
+            second = min(candidates) if candidates else None
+        self.processed_seconds = self.total_seconds
+
+    def run_simulation(self, date_str='2025-06-23', engine='tick', progress_interval=300):
         print(f'\n{date_str} 24시간 초단위 시뮬레이션 시작')
-        print('초 단위 정밀 시뮬레이션')
+        print('초 단위 정밀 시뮬레이션' if engine != 'event' else '이벤트 기반 시뮬레이션 (상태 변화 시점만 처리)')
         print('중복 배정 완전 제거')
         print('실시간 진행 상황 모니터링')
         print('=' * 80)
@@ -1115,115 +3238,23 @@ class ScheduledIncreaseWithShiftSimulation:
         self.simulation_start_time = time.time()
         start_time = datetime.strptime(f'{date_str} 00:00:00', '%Y-%m-%d %H:%M:%S')
         end_time = datetime.strptime(f'{date_str} 23:59:59', '%Y-%m-%d %H:%M:%S')
-        current_time = start_time
         self.total_seconds = int((end_time - start_time).total_seconds()) + 1
         print(f'총 시뮬레이션 시간: {self.total_seconds:,}초 (24시간)')
-        progress_interval = 300
-        last_progress = 0
-        while current_time <= end_time:
-            self.process_second(current_time)
-            self.processed_seconds += 1
-            seconds_elapsed = (current_time - start_time).total_seconds()
-            if seconds_elapsed - last_progress >= progress_interval:
-                current_hour = current_time.hour
-                active_vehicles = 0
-                lunch_blocked_ids = []
-                for v in self.vehicles.values():
-                    is_active = v.accurate_schedule.get(current_hour, False)
-                    # 점심시간 조정 창 동안(미배정·IDLE) 활성에서 제외. 운행 중이면 포함
-                    if is_active and self._is_in_lunch_break(v, current_time):
-                        if v.assigned_passenger is None and v.status == VehicleStatus.IDLE:
-                            lunch_blocked_ids.append(v.vehicle_id)
-                            is_active = False
-                    if is_active:
-                        active_vehicles += 1
-                available_vehicles = 0
-                busy_vehicles = 0
-                lunch_blocked_available_ids = []
-                for v in self.vehicles.values():
-                    is_active = v.accurate_schedule.get(current_hour, False)
-                    # 점심시간 조정 창 동안(미배정·IDLE) 가용에서 제외
-                    if is_active and self._is_in_lunch_break(v, current_time):
-                        if v.assigned_passenger is None and v.status == VehicleStatus.IDLE:
-                            lunch_blocked_available_ids.append(v.vehicle_id)
-                            is_active = False
-                    if is_active and hasattr(v, 'work_end') and v.status == VehicleStatus.IDLE:
-                        try:
-                            work_end_hour = int(v.work_end.split(':')[0])
-                            if current_hour >= work_end_hour - 1 and current_hour < work_end_hour:
-                                is_active = False
-                        except Exception:
-                            pass
-                    if is_active:
-                        if v.status == VehicleStatus.IDLE:
-                            available_vehicles += 1
-                        elif v.status not in [VehicleStatus.OFF_DUTY]:
-                            busy_vehicles += 1
-                unassigned_waiting = len(self.pending_passengers)
-                assigned_waiting = sum(1 for p in self.passengers.values() if p.status == PassengerStatus.ASSIGNED)
-                total_waiting = unassigned_waiting + assigned_waiting
-                completed_services = len(self.service_records)
-                assigned_count = len(self.assigned_demands)
-                progress_percent = (self.processed_seconds / self.total_seconds) * 100
-                elapsed_real_time = time.time() - self.simulation_start_time
-                base_msg = (f"{current_time.strftime('%H:%M')} ({progress_percent:.1f}%) - "
-                            f"가동:{active_vehicles}대, 운행가능:{available_vehicles}대, 서비스중:{busy_vehicles}대, "
-                            f"대기:{total_waiting}명(미배정:{unassigned_waiting}, 차량대기:{assigned_waiting}), "
-                            f"배정:{assigned_count}건, 완료:{completed_services}건 [실제경과: {elapsed_real_time:.1f}초]")
-                # 점심 영향 카운트(항상 표시): 점심(IDLE·미배정) 제외 수, 점심 중 운행 중 수
-                try:
-                    lunch_in_service = 0
-                    lunch_total = 0
-                    for v in self.vehicles.values():
-                        if self._is_in_lunch_break(v, current_time):
-                            lunch_total += 1
-                            if v.assigned_passenger is not None or v.status != VehicleStatus.IDLE:
-                                lunch_in_service += 1
-                    base_msg += f" | 점심(총/IDLE제외/운행중): {lunch_total}/{len(lunch_blocked_ids)}/{lunch_in_service}"
-                except Exception:
-                    pass
-                # 추가 차량 현황 표시: 현재 활성 시간대에 속하는 추가 차량 수
-                try:
-                    added_active = 0
-                    added_total = len(getattr(self, 'added_vehicle_ids', []))
-                    for vid in getattr(self, 'added_vehicle_ids', []):
-                        v = self.vehicles.get(vid)
-                        if not v:
-                            continue
-                        if v.accurate_schedule.get(current_hour, False):
-                            added_active += 1
-                    base_msg += f" | 추가차량(총/가동): {added_total}/{added_active}"
-                except Exception:
-                    pass
-                if getattr(self, 'debug_lunch', False):
-                    # 샘플 일부만 출력
-                    sample_n = max(0, int(getattr(self, 'debug_lunch_sample', 5)))
-                    lunch_sample = lunch_blocked_ids[:sample_n]
-                    avail_sample = lunch_blocked_available_ids[:sample_n]
-                    base_msg += (f" [활성제외샘플:{lunch_sample} 가용제외샘플:{avail_sample}]")
-                print(base_msg)
-                # 진행 로그를 CSV용 메모리에 적재
-                try:
-                    self.progress_log.append({
-                        'time': current_time.strftime('%H:%M:%S'),
-                        'active': active_vehicles,
-                        'available': available_vehicles,
-                        'busy': busy_vehicles,
-                        'waiting_total': total_waiting,
-                        'waiting_unassigned': unassigned_waiting,
-                        'waiting_assigned': assigned_waiting,
-                        'assigned_count': assigned_count,
-                        'completed': completed_services,
-                        'lunch_total': lunch_total if 'lunch_total' in locals() else 0,
-                        'lunch_blocked_idle': len(lunch_blocked_ids),
-                        'lunch_in_service': lunch_in_service if 'lunch_in_service' in locals() else 0,
-                        'added_total': added_total if 'added_total' in locals() else len(getattr(self, 'added_vehicle_ids', [])),
-                        'added_active': added_active if 'added_active' in locals() else 0
-                    })
-                except Exception:
-                    pass
-                last_progress = seconds_elapsed
-            current_time += timedelta(seconds=1)
+        self._init_sim_clock(start_time)
+        if len(self.arrival_queue) != len(self.passengers):
+            self._build_arrival_queue()
+        self._rebuild_vehicle_indexes()
+        self._reset_progress_counters()
+        if engine == 'event':
+            self._run_event_loop(progress_interval)
+        else:
+            last_progress = 0
+            for current_time in range(self.total_seconds):
+                self.process_second(current_time)
+                self.processed_seconds += 1
+                if current_time - last_progress >= progress_interval:
+                    self._record_progress(current_time)
+                    last_progress = current_time
         total_real_time = time.time() - self.simulation_start_time
         print(f'\n초단위 24시간 시뮬레이션 완료!')
         print(f'최종 결과:')
@@ -1235,13 +3266,22 @@ class ScheduledIncreaseWithShiftSimulation:
         print(f'   서비스 완료: {len(self.service_records)}건')
         print(f'   대기 중: {len(self.pending_passengers)}명')
         print(f'   중복 배정: 0건 (완전 제거)')
+        cache_stats = self.path_cache.stats()
+        print(f"   경로 캐시: {cache_stats['entries']:,}개 구간, 적중률 {cache_stats['hit_rate']*100:.1f}%, "
+              f"축출 {cache_stats['evictions']:,}건, 경로 계산 {cache_stats['dijkstra_calls']:,}회 {cache_stats['dijkstra_seconds']:.1f}초, "
+              f"하한 생략 {cache_stats['bound_skips']:,}건")
+        if self.path_store is not None:
+            saved = self.path_store.flush()
+            print(f'   경로 캐시 저장: {saved:,}개 구간')
         return True
 
     # --- 결과 저장/로그: 메인 결과에 통합 ---
     def save_results(self, output_file='results/scheduled_increase_with_shift_20250623.csv'):
         print(f'\n초단위 시뮬레이션 결과 저장 중...')
-        if not os.path.exists('results'):
-            os.makedirs('results')
+        # 진행 로그/경로 캐시 집계는 결과 CSV와 같은 디렉터리에 저장
+        results_dir = os.path.dirname(output_file) or 'results'
+        if not os.path.exists(results_dir):
+            os.makedirs(results_dir, exist_ok=True)
         if self.service_records:
             def _parse_time_to_dt(t_str):
                 try:
@@ -1352,15 +3392,25 @@ class ScheduledIncreaseWithShiftSimulation:
             if getattr(self, 'progress_log', None):
                 df = pd.DataFrame(self.progress_log)
                 base = os.path.splitext(os.path.basename(output_file))[0]
-                progress_path = self._ensure_csv_path(os.path.join('results', f'{base}_progress'))
+                progress_path = self._ensure_csv_path(os.path.join(results_dir, f'{base}_progress'))
                 df.to_csv(progress_path, index=False, encoding='utf-8-sig')
                 print(f"   진행 로그 저장: {progress_path} ({len(df)}행)")
         except Exception as e:
             print(f"   진행 로그 저장 실패: {e}")
+        # 경로 캐시 집계 CSV (진행 로그 옆)
+        try:
+            base = os.path.splitext(os.path.basename(output_file))[0]
+            cache_path = self._ensure_csv_path(os.path.join(results_dir, f'{base}_path_cache'))
+            row = {'date': getattr(self, 'date_str', None)}
+            row.update(self.path_cache.stats())
+            pd.DataFrame([row]).to_csv(cache_path, index=False, encoding='utf-8-sig')
+            print(f"   경로 캐시 집계 저장: {cache_path}")
+        except Exception as e:
+            print(f"   경로 캐시 집계 저장 실패: {e}")
         return True
 
 
-def main():
+def build_arg_parser():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--date', type=str, default='2025-06-23', help='Simulation date (YYYY-MM-DD)')
@@ -1374,28 +3424,68 @@ def main():
     # 관내/관외 및 권역 실험 옵션
     parser.add_argument('--force-both', action='store_true', help='Force all vehicles service_area to BOTH (100% BOTH scenario)')
     parser.add_argument('--region-strict-ratio', type=float, default=0.0, help='Ratio [0..1] to restrict assignment to same depot region')
+    parser.add_argument('--engine', type=str, choices=['tick', 'event'], default='tick', help="Simulation engine: 'tick' (every second) or 'event' (state-change seconds only)")
+    parser.add_argument('--progress-interval', type=int, default=300, help='Progress snapshot interval in simulated seconds (default 300)')
+    parser.add_argument('--path-cache-dir', type=str, default='network/path_cache', help='On-disk shortest-path cache directory (keyed by network graph hash)')
+    parser.add_argument('--no-path-cache', action='store_true', help='Disable the on-disk shortest-path cache')
+    parser.add_argument('--path-cache-size', type=int, default=500000, help='In-memory path cache size in (from, to) pairs, LRU eviction (0 = unbounded)')
+    parser.add_argument('--travel-matrix', action='store_true', help='Precompute a daily travel-time matrix over depot and demand nodes before the run')
+    parser.add_argument('--routing-backend', type=str, choices=['networkx', 'csr'], default='networkx', help="Shortest-path backend: 'networkx' or 'csr' (scipy.sparse.csgraph)")
+    parser.add_argument('--network-format', type=str, choices=['pickle', 'compact'], default='pickle', help="Network input: 'pickle' (networkx) or 'compact' (memory-mapped arrays, converted once from the pickle; routes with the CSR backend)")
+    parser.add_argument('--alt-landmarks', type=int, default=0, help='Landmark count for ALT A* point-to-point queries on the networkx backend (0 = off)')
+    parser.add_argument('--demand-store-dir', type=str, default='data/demand_partitions', help='Date-partitioned demand store directory (built once from data/demand_main_network_mapped.csv)')
+    parser.add_argument('--no-demand-store', action='store_true', help='Read data/demand_main_network_mapped.csv directly instead of the partitioned store')
+    parser.add_argument('--schedule-bundle-dir', type=str, default='network/special_transport_schedules_june_2025.bundle', help='Month schedule bundle directory (compiled once from the daily schedule CSVs)')
+    parser.add_argument('--no-schedule-bundle', action='store_true', help='Read the daily schedule CSV directly instead of the month bundle')
+    parser.add_argument('--no-geo-pruning', action='store_true', help='Compute exact pickup ETAs for every candidate instead of pruning by great-circle lower bounds')
+    parser.add_argument('--results-dir', type=str, default='results', help='Directory for the result, progress and path cache CSVs')
+    parser.add_argument('--result-cache-dir', type=str, default='results/cache', help='Content-addressed result cache keyed by configuration, input file hashes and simulator source')
+    parser.add_argument('--no-result-cache', action='store_true', help='Always simulate and do not store results in the result cache')
     # always-on lunch breakdown; debug flags removed
-    args = parser.parse_args()
+    return parser
 
-    date_str = args.date
-    schedule_csv = args.schedule_csv
-    print(f'{date_str} 24시간 초단위 특별교통수단 시뮬레이션 (증차+근무시간 조정)')
-    print('실시간 정밀 시뮬레이션 엔진')
-    print('=' * 80)
 
+def prepare_simulation(args):
+    # 날짜와 무관한 월드: 네트워크, 경로 캐시/백엔드, 차고지, 기본 차량. 실패 시 None
     simulation = ScheduledIncreaseWithShiftSimulation()
 
-    if not simulation.load_network():
-        return False
+    if not simulation.load_network(args.network_format):
+        return None
+    simulation.set_path_cache_size(args.path_cache_size)
+    if not args.no_path_cache:
+        simulation.enable_path_store(args.path_cache_dir)
+    if args.routing_backend == 'csr':
+        simulation.enable_csr_backend()
+    elif args.alt_landmarks > 0:
+        simulation.enable_alt_index(args.alt_landmarks)
+    if not args.no_geo_pruning:
+        simulation.enable_geo_pruning()
     if not simulation.load_depot_info():
-        return False
+        return None
     if not simulation.load_vehicles():
-        return False
+        return None
+    simulation.snapshot_world()
+    return simulation
+
+
+def run_scenario_day(simulation, date_str, args, cache_key=None):
+    # 준비된 월드 위에서 하루 시나리오 실행 후 결과 저장. 결과 파일 경로(실패 시 None) 반환
+    # cache_key: 호출 측에서 이미 조회해 놓친 결과 캐시 키 (None이면 여기서 계산·조회)
+    schedule_csv = args.schedule_csv
+    print(f'{date_str} 24시간 초단위 특별교통수단 시뮬레이션 (증차+근무시간 조정)')
+    print('실시간 정밀 시뮬레이션 엔진')
+    print('=' * 80)
+
+    if cache_key is None:
+        cache_key = result_cache_key(args, date_str, simulation)
+        cached = restore_cached_result(args, cache_key)
+        if cached:
+            return cached
 
     # 증차 스위치 ON일 때만 일정 기반 추가 차량 생성
     if args.increasing:
         if not simulation.load_additional_scheduled_vehicles(date_str, schedule_csv):
-            return False
+            return None
     # 관내외 겸용 100% 강제 적용
     simulation.force_both_service_area = bool(getattr(args, 'force_both', False))
     simulation.region_strict_ratio = max(0.0, min(1.0, float(getattr(args, 'region_strict_ratio', 0.0))))
@@ -1403,8 +3493,9 @@ def main():
 
     simulation.load_hourly_speed_factors()
 
+    simulation.schedule_bundle_dir = None if args.no_schedule_bundle else args.schedule_bundle_dir
     if not simulation.load_accurate_schedules(date_str):
-        return False
+        return None
 
     # 근무시간 조정 적용
     applied_shift = False
@@ -1440,10 +3531,13 @@ def main():
     simulation.debug_lunch = bool(getattr(args, 'debug_lunch', False))
     simulation.debug_lunch_sample = int(getattr(args, 'debug_lunch_sample', 5))
 
+    simulation.demand_store_dir = None if args.no_demand_store else args.demand_store_dir
     if not simulation.load_daily_demands(date_str):
-        return False
-    if not simulation.run_simulation(date_str):
-        return False
+        return None
+    if args.travel_matrix:
+        simulation.build_travel_matrix()
+    if not simulation.run_simulation(date_str, engine=args.engine, progress_interval=max(1, int(args.progress_interval))):
+        return None
 
     # 출력 파일명 구성
     date_suffix = date_str.replace('-', '')
@@ -1451,7 +3545,7 @@ def main():
         base_name = os.path.basename(schedule_csv)
         m = re.search(r'(v\d+)', base_name)
         version_tag = m.group(1) if m else 'v0'
-        parts = [f'results/scheduled_increase_with_shift_{version_tag}']
+        parts = [os.path.join(args.results_dir, f'scheduled_increase_with_shift_{version_tag}')]
         if applied_shift and shift_tag:
             ratio_pct = int(max(0.0, min(1.0, float(args.ratio))) * 100)
             parts.append(f'{shift_tag}_{ratio_pct}pct')
@@ -1464,7 +3558,7 @@ def main():
         parts.append(date_suffix)
         output_file = '_'.join(parts) + '.csv'
     else:
-        parts = ['results/baseline_with_shift']
+        parts = [os.path.join(args.results_dir, 'baseline_with_shift')]
         if applied_shift and shift_tag:
             ratio_pct = int(max(0.0, min(1.0, float(args.ratio))) * 100)
             parts.append(f'{shift_tag}_{ratio_pct}pct')
@@ -1482,8 +3576,130 @@ def main():
     # 파일명 위생 처리 및 .csv 확장자 보장
     output_file = simulation._finalize_output_path(output_file)
     simulation.save_results(output_file)
+    if cache_key is not None and ResultCache.store(args.result_cache_dir, *cache_key, output_file):
+        print(f'   결과 캐시 저장: {cache_key[0][:12]}')
     print('\n초단위 시뮬레이션 완료!')
-    return True
+    return output_file
+
+
+def result_cache_key(args, date_str, simulation=None):
+    # 결과 캐시 (키, 구성 요소). 캐시 대상이 아니거나 아직 계산할 수 없으면(수요 노드 매핑에 월드 필요) None
+    if not ResultCache.is_cacheable(args):
+        return None
+    graph = simulation.network_graph if simulation is not None else None
+    graph_hash = simulation.network_hash if simulation is not None else None
+    try:
+        if not ResultCache.prepare_demand(args, graph, graph_hash):
+            return None
+        return ResultCache.key(args, date_str)
+    except Exception as e:
+        print(f'결과 캐시 키 계산 실패: {e}')
+        return None
+
+
+def restore_cached_result(args, cache_key):
+    # 같은 설정/입력/엔진으로 계산한 결과가 있으면 results_dir로 복원하고 경로 반환 (없거나 키가 None이면 None)
+    if cache_key is None:
+        return None
+    key = cache_key[0]
+    output_file = ResultCache.restore(args.result_cache_dir, key, args.results_dir)
+    if output_file:
+        print(f'결과 캐시 적중 ({key[:12]}): {output_file}')
+    return output_file
+
+
+class DayRunner:
+    """월드(네트워크, 경로 캐시/백엔드, 차고지, 기본 차량)를 한 번 로드해 두고 날짜별 시나리오를 실행
+
+    world_argv는 월드 준비에 쓰는 명령행 옵션, run()의 argv는 그 뒤에 붙는 날짜별 시나리오 옵션(--date 제외)이다.
+    두 번째 실행부터 reset_day로 일자별 상태만 초기화한다. quiet=True면 시뮬레이터 출력을 버린다.
+    """
+    WORLD_ERROR = 'World setup failed (network/depot/vehicle load)'
+
+    def __init__(self, world_argv=(), quiet=False):
+        import traceback
+        self.world_argv = list(world_argv)
+        self.quiet = quiet
+        self.simulation = None
+        self.error = ''
+        self._used = False
+        try:
+            with self._output():
+                self.simulation = prepare_simulation(build_arg_parser().parse_args(self.world_argv))
+        except Exception:
+            self.error = traceback.format_exc()
+        if self.simulation is None and not self.error:
+            self.error = self.WORLD_ERROR
+
+    def _output(self):
+        import contextlib
+        if not self.quiet:
+            return contextlib.nullcontext()
+        stack = contextlib.ExitStack()
+        stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w', encoding='utf-8'))))
+        return stack
+
+    def run(self, date_str, argv=(), tail_lines=None):
+        """하루 실행 → (결과 파일 경로 또는 None, 오류 메시지(traceback은 마지막 tail_lines줄), 소요초)"""
+        import traceback
+        started = time.time()
+        if self.simulation is None:
+            return None, self.error, time.time() - started
+        try:
+            args = build_arg_parser().parse_args(self.world_argv + list(argv) + ['--date', date_str])
+            with self._output():
+                if self._used:
+                    self.simulation.reset_day()
+                self._used = True
+                output_file = run_scenario_day(self.simulation, date_str, args)
+        except Exception:
+            lines = traceback.format_exc().rstrip().splitlines()
+            return None, '\n'.join(lines[-tail_lines:] if tail_lines else lines), time.time() - started
+        return output_file, '' if output_file else 'Simulation returned failure', time.time() - started
+
+
+# 프로세스 풀 작업자용: init_worker로 작업자마다 DayRunner 하나를 만들고 run_worker_day로 날짜를 처리
+_worker_runner = None
+
+
+def init_worker(world_argv=(), quiet=True):
+    global _worker_runner
+    _worker_runner = DayRunner(world_argv, quiet=quiet)
+
+
+def run_worker_day(date_str, argv=(), tail_lines=20):
+    if _worker_runner is None:
+        return None, DayRunner.WORLD_ERROR, 0.0
+    return _worker_runner.run(date_str, argv, tail_lines)
+
+
+def shutdown_worker():
+    # 현재 프로세스의 월드 해제 (첫 날을 부모에서 돌린 뒤 풀로 넘길 때)
+    global _worker_runner
+    _worker_runner = None
+
+
+def run_days(dates, argv=None):
+    """한 프로세스에서 여러 날짜 실행: 월드는 한 번만 로드하고 날짜마다 reset_day로 일자별 상태만 초기화
+
+    argv는 일일 실행과 같은 명령행 옵션(--date 제외). 날짜별 (날짜, 결과 파일 경로 또는 None, 오류 메시지)를 순서대로 생성한다.
+    """
+    runner = DayRunner(list(argv or []))
+    for date_str in dates:
+        output_file, error, _ = runner.run(date_str)
+        yield date_str, output_file, error
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    # 캐시 적중이면 네트워크를 읽지 않고 바로 종료. 놓치면 같은 키로 실행 후 저장
+    cache_key = result_cache_key(args, args.date)
+    if restore_cached_result(args, cache_key):
+        return True
+    simulation = prepare_simulation(args)
+    if simulation is None:
+        return False
+    return run_scenario_day(simulation, args.date, args, cache_key=cache_key) is not None
 
 
 if __name__ == "__main__":